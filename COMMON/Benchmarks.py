@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+
+########################################################################
+# Benchmarks.py:
+# Throughput and accuracy benchmarks of the COMMON functions
+#
+# Usage:
+# i.e: Benchmarks.py [BENCHMARK ...]
+# Runs all the benchmarks if none is given
+# Exits with status 1 if a check fails (e.g. columnar values differ)
+########################################################################
+
+import sys, os
+import time
+import tempfile, shutil
+import math
+from collections import OrderedDict
+import numpy as np
+# Add path to find all modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+from COMMON.Coordinates import xyz2llh
+from COMMON.Coordinates import xyz2llhArray
+from COMMON.Coordinates import Xyz2llhMethods
+from COMMON import Dates
+from COMMON.Columnar import appendColumnar
+from COMMON.Columnar import loadColumnar
+
+# WGS84 constants
+WGS84_A = 6378137.0
+WGS84_F = 1.0 / 298.257223563
+
+# Get the best time of Repeat calls to Function [s]
+def timeFunction(Function, Args, Repeat=3):
+    Best = None
+    for i in range(Repeat):
+        Start = time.perf_counter()
+        Result = Function(*Args)
+        Elapsed = time.perf_counter() - Start
+        if Best is None or Elapsed < Best:
+            Best = Elapsed
+
+    return Best, Result
+
+# Generate random ECEF positions [m] with heights between Hmin and Hmax
+def generateEcefPoints(Npoints, Hmin, Hmax, Seed=0):
+    Rng = np.random.default_rng(Seed)
+    Lon = Rng.uniform(-math.pi, math.pi, Npoints)
+    Lat = np.arcsin(Rng.uniform(-1.0, 1.0, Npoints))
+    H = Rng.uniform(Hmin, Hmax, Npoints)
+
+    e2 = WGS84_F * (2.0 - WGS84_F)
+    N = WGS84_A / np.sqrt(1.0 - e2 * np.sin(Lat)**2)
+    Xyz = np.empty((Npoints, 3))
+    Xyz[:,0] = (N + H) * np.cos(Lat) * np.cos(Lon)
+    Xyz[:,1] = (N + H) * np.cos(Lat) * np.sin(Lon)
+    Xyz[:,2] = ((1.0 - e2) * N + H) * np.sin(Lat)
+
+    return Xyz
+
+# Benchmark the ECEF to geodetic solvers against the scalar xyz2llh
+# Reports the throughput and the maximum error of latitude and longitude
+# (as a distance at the point) and height
+def benchmarkXyz2llh(Npoints=200000, NpointsRef=20000):
+    Cases = OrderedDict({})
+    Cases["Ground stations"] = (-100.0, 5000.0)
+    Cases["Orbit altitude"] = (19000e3, 36000e3)
+
+    Deg2Rad = math.pi / 180.0
+
+    for Case, (Hmin, Hmax) in Cases.items():
+        Xyz = generateEcefPoints(Npoints, Hmin, Hmax)
+        Radius = np.sqrt(np.sum(Xyz[:NpointsRef]**2, axis=1))
+
+        # Reference: scalar xyz2llh
+        Elapsed, Ref = timeFunction(lambda Points: \
+            np.array([xyz2llh(x, y, z) for x, y, z in Points.tolist()]).T,
+            (Xyz[:NpointsRef],), 1)
+
+        print("%s (h: %.0f to %.0f m)" % (Case, Hmin, Hmax))
+        print("  %-10s %12s %12s %12s %12s" % \
+            ("Method", "Points/s", "MaxLat[mm]", "MaxLon[mm]", "MaxH[mm]"))
+        print("  %-10s %12.0f %12s %12s %12s" % \
+            ("xyz2llh", NpointsRef / Elapsed, "-", "-", "-"))
+
+        for Method in Xyz2llhMethods:
+            Elapsed, Llh = timeFunction(xyz2llhArray, (Xyz, Method))
+            Lon, Lat, H = [Values[:NpointsRef] for Values in Llh]
+            # Wrap the longitude differences
+            DLon = (Lon - Ref[0] + 180.0) % 360.0 - 180.0
+            ErrLat = np.max(np.abs(Lat - Ref[1]) * Deg2Rad * Radius)
+            ErrLon = np.max(np.abs(DLon) * Deg2Rad * Radius * \
+                np.cos(Ref[1] * Deg2Rad))
+            ErrH = np.max(np.abs(H - Ref[2]))
+            print("  %-10s %12.0f %12.6f %12.6f %12.6f" % \
+                (Method, Npoints / Elapsed,
+                ErrLat * 1e3, ErrLon * 1e3, ErrH * 1e3))
+
+        print()
+
+# Benchmark the array date conversions against the scalar ones
+# Reports the throughput of both versions and whether they give
+# identical results
+def benchmarkDates(Ndays=100000):
+    Jd = np.arange(2444245, 2444245 + Ndays)
+    Year, Month, Day = Dates.convertJulianDay2YearMonthDayArray(Jd)
+    Ymd = list(zip(Year.tolist(), Month.tolist(), Day.tolist()))
+
+    Cases = OrderedDict({})
+    Cases["JulianDay2YearMonthDay"] = (
+        lambda: [Dates.convertJulianDay2YearMonthDay(j) for j in Jd.tolist()],
+        lambda: Dates.convertJulianDay2YearMonthDayArray(Jd))
+    Cases["YearMonthDay2JulianDay"] = (
+        lambda: [Dates.convertYearMonthDay2JulianDay(*Date) for Date in Ymd],
+        lambda: Dates.convertYearMonthDay2JulianDayArray(Year, Month, Day))
+    Cases["YearMonthDay2Doy"] = (
+        lambda: [Dates.convertYearMonthDay2Doy(*Date) for Date in Ymd],
+        lambda: Dates.convertYearMonthDay2DoyArray(Year, Month, Day))
+    Cases["JulianDay2EgnosEpoch"] = (
+        lambda: [Dates.convertJulianDay2EgnosEpoch(j) for j in Jd.tolist()],
+        lambda: Dates.convertJulianDay2EgnosEpochArray(Jd))
+
+    print("%d days" % Ndays)
+    print("  %-24s %12s %12s %8s %10s" % \
+        ("Function", "Scalar/s", "Array/s", "Speedup", "Identical"))
+    for Case, (Scalar, Array) in Cases.items():
+        ScalarTime, ScalarResult = timeFunction(Scalar, (), 1)
+        ArrayTime, ArrayResult = timeFunction(Array, ())
+        Identical = np.array_equal(np.array(ScalarResult),
+            np.array(ArrayResult).T)
+        print("  %-24s %12.0f %12.0f %8.1f %10s" % \
+            (Case, Ndays / ScalarTime, Ndays / ArrayTime,
+            ScalarTime / ArrayTime, Identical))
+
+    print()
+
+# Benchmark the loading of the binary columnar files against the text
+# files of the same ENT-GPS Offsets (Ndays days of 10 s epochs)
+# Returns False if the values read differ
+def benchmarkColumnar(Ndays=90, NEpochs=8640):
+    from pandas import read_csv
+
+    TmpDir = tempfile.mkdtemp()
+    try:
+        # Write the days to a columnar file and to text files
+        Rng = np.random.default_rng(0)
+        ColumnarDir = os.path.join(TmpDir, "ENTGPS.col")
+        TextFiles = []
+        for Day in range(Ndays):
+            Sod = np.arange(NEpochs, dtype='int32') * 10
+            EntGps = np.round(Rng.normal(0.0, 1.0, NEpochs), 4)
+            appendColumnar(ColumnarDir, OrderedDict([
+                ("JD", np.full(NEpochs, 2458850 + Day, dtype='int32')),
+                ("SoD", Sod), ("ENT-GPS", EntGps)]))
+
+            TextFiles.append(os.path.join(TmpDir, "ENTGPS_%03d.dat" % Day))
+            with open(TextFiles[-1], 'w') as f:
+                f.write("#SoD  ENT-GPS\n")
+                f.write("".join(["%5d %10.4f\n" % Row \
+                    for Row in zip(Sod.tolist(), EntGps.tolist())]))
+
+        # Load all the days and reduce one column
+        TextTime, TextSum = timeFunction(lambda: sum(
+            read_csv(File, sep=r'\s+', skiprows=1, header=None)[1].sum()
+            for File in TextFiles), (), 1)
+        ColumnarTime, ColumnarSum = timeFunction(lambda: \
+            loadColumnar(ColumnarDir)["ENT-GPS"].sum(), ())
+        OpenTime, Columns = timeFunction(loadColumnar, (ColumnarDir,))
+
+    finally:
+        shutil.rmtree(TmpDir, ignore_errors=True)
+
+    Ok = abs(TextSum - ColumnarSum) < 1e-6 * Ndays * NEpochs
+    print("%d days x %d epochs" % (Ndays, NEpochs))
+    print("  Text files (read_csv):     %8.3f s" % TextTime)
+    print("  Columnar file (open+sum):  %8.3f s" % ColumnarTime)
+    print("  Columnar file (open only): %8.3f ms" % (OpenTime * 1e3))
+    print("  %s\n" % ("OK" if Ok else "FAILED: different values"))
+
+    return Ok
+
+# Define the benchmarks
+Benchmarks = OrderedDict({})
+Benchmarks["xyz2llh"] = benchmarkXyz2llh
+Benchmarks["dates"] = benchmarkDates
+Benchmarks["columnar"] = benchmarkColumnar
+
+#######################################################
+# MAIN BODY
+#######################################################
+
+if __name__ == "__main__":
+
+    # Select the benchmarks to run
+    Names = sys.argv[1:] if len(sys.argv) > 1 else list(Benchmarks.keys())
+
+    for Name in Names:
+        if Name not in Benchmarks:
+            sys.stderr.write("ERROR: Unknown benchmark %s (%s)\n" % \
+                (Name, ", ".join(Benchmarks.keys())))
+            sys.exit(1)
+
+    Failed = []
+    for Name in Names:
+        print("=== %s ===" % Name)
+        if Benchmarks[Name]() is False:
+            Failed.append(Name)
+
+    if len(Failed) > 0:
+        sys.stderr.write("ERROR: Failed checks: %s\n" % ", ".join(Failed))
+        sys.exit(1)
@@ -0,0 +1,192 @@
+import sys, os
+import json, time, hashlib, shutil
+import numpy as np
+
+# Name of the file describing a cache entry
+META_FILE = "META.json"
+
+# Size of the blocks read to compute the content hash [bytes]
+HASH_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Entries used in the last CACHE_EVICT_GRACE seconds are never evicted,
+# as other processes may have just memory-mapped them [s]
+CACHE_EVICT_GRACE = 60
+
+# Update Hash with the next Size bytes of the open file f
+# (up to the end of the file if Size is None)
+def updateFileHash(Hash, f, Size=None):
+    while Size is None or Size > 0:
+        Block = f.read(HASH_BLOCK_SIZE if Size is None \
+            else min(Size, HASH_BLOCK_SIZE))
+        if not Block:
+            break
+        Hash.update(Block)
+        if Size is not None:
+            Size -= len(Block)
+
+    return Hash
+
+# Compute the content hash of a file
+def computeFileHash(File):
+    with open(File, 'rb') as f:
+        return updateFileHash(hashlib.sha1(), f).hexdigest()
+
+# Get the directory of the cache entry of a file
+def getCacheEntryDir(CacheDir, File):
+    PathHash = hashlib.sha1(os.path.abspath(File).encode()).hexdigest()
+
+    return os.path.join(CacheDir,
+        os.path.basename(File) + "." + PathHash[:12])
+
+# Get the size of a cache entry [bytes]
+def getCacheEntrySize(EntryDir):
+    Size = 0
+    for Name in os.listdir(EntryDir):
+        Size += os.path.getsize(os.path.join(EntryDir, Name))
+
+    return Size
+
+# Read the description of a cache entry (None if not valid)
+def readCacheMeta(EntryDir):
+    try:
+        with open(os.path.join(EntryDir, META_FILE), 'r') as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return None
+
+# Memory-map the columns of a cache entry
+def loadCacheEntry(EntryDir, Meta):
+    Columns = {}
+    for Var, Name in Meta["Columns"].items():
+        Columns[Var] = np.load(os.path.join(EntryDir, Name), mmap_mode='r')
+
+    # Mark the entry as recently used for the LRU eviction
+    # (the columns are loaded even if the cache is read-only)
+    try:
+        os.utime(os.path.join(EntryDir, META_FILE))
+
+    except OSError:
+        pass
+
+    return Columns
+
+# Write a cache entry
+# The entry is built in a temporary directory and then renamed, so that
+# concurrent processes never see a partial entry
+def writeCacheEntry(EntryDir, Columns, Meta):
+    TmpDir = EntryDir + ".tmp%d" % os.getpid()
+    shutil.rmtree(TmpDir, ignore_errors=True)
+    os.makedirs(TmpDir)
+
+    Meta["Columns"] = {}
+    for Index, (Var, Values) in enumerate(Columns.items()):
+        Name = "COL%02d.npy" % Index
+        np.save(os.path.join(TmpDir, Name), np.ascontiguousarray(Values))
+        Meta["Columns"][Var] = Name
+
+    with open(os.path.join(TmpDir, META_FILE), 'w') as f:
+        json.dump(Meta, f)
+
+    shutil.rmtree(EntryDir, ignore_errors=True)
+    try:
+        os.rename(TmpDir, EntryDir)
+
+    except OSError:
+        # Another process created the entry in the meantime
+        shutil.rmtree(TmpDir, ignore_errors=True)
+
+# Remove the least recently used entries until the cache fits in MaxMb
+# KeepDir and the entries used in the last CACHE_EVICT_GRACE seconds are
+# kept, even if the cache doesn't fit in MaxMb
+def evictCache(CacheDir, MaxMb, KeepDir=None):
+    Entries = []
+    TotalSize = 0
+    for Name in os.listdir(CacheDir):
+        EntryDir = os.path.join(CacheDir, Name)
+        MetaFile = os.path.join(EntryDir, META_FILE)
+        try:
+            LastUsed = os.path.getmtime(MetaFile)
+            Size = getCacheEntrySize(EntryDir)
+
+        except OSError:
+            # Not an entry, or removed by another process
+            continue
+        Entries.append((LastUsed, Size, EntryDir))
+        TotalSize += Size
+
+    # Remove the oldest used entries first
+    Now = time.time()
+    for LastUsed, Size, EntryDir in sorted(Entries):
+        if TotalSize <= MaxMb * 1024 * 1024:
+            break
+        if EntryDir == KeepDir or Now - LastUsed < CACHE_EVICT_GRACE:
+            continue
+        shutil.rmtree(EntryDir, ignore_errors=True)
+        TotalSize -= Size
+
+# Read the columns of a text file through the binary cache
+# Parse(File) returns the dictionary of NumPy columns of File. It is
+# only called if the cache has no valid entry for the file, which is
+# identified by its size, modification time and content hash.
+#   CacheDir: Directory of the cache (default: .cache next to File)
+#   MaxMb:    Maximum size of the cache [MB] (0: no limit)
+#   Verify:   Check the content hash even if size and mtime match
+#   Refresh:  Ignore the existing entry and parse the file again
+def readCachedColumns(File, Parse,
+    CacheDir=None, MaxMb=0, Verify=False, Refresh=False):
+
+    # Get the cache directory
+    if not CacheDir:
+        CacheDir = os.path.join(os.path.dirname(os.path.abspath(File)),
+            ".cache")
+    EntryDir = getCacheEntryDir(CacheDir, File)
+
+    # Get the file signature
+    Stat = os.stat(File)
+    Size = Stat.st_size
+    MtimeNs = Stat.st_mtime_ns
+    Hash = None
+
+    # Check the existing entry
+    Meta = readCacheMeta(EntryDir)
+    if Meta is not None and not Refresh and Meta["Size"] == Size:
+        # Size and mtime match: the file didn't change
+        if Meta["MtimeNs"] == MtimeNs and not Verify:
+            return loadCacheEntry(EntryDir, Meta)
+
+        # Otherwise check the content
+        Hash = computeFileHash(File)
+        if Meta["Hash"] == Hash:
+            # Keep the new mtime to avoid hashing the file again
+            if Meta["MtimeNs"] != MtimeNs:
+                Meta["MtimeNs"] = MtimeNs
+                with open(os.path.join(EntryDir, META_FILE), 'w') as f:
+                    json.dump(Meta, f)
+
+            return loadCacheEntry(EntryDir, Meta)
+
+    # Parse the file and store the columns
+    Columns = Parse(File)
+    if Hash is None:
+        Hash = computeFileHash(File)
+
+    try:
+        os.makedirs(CacheDir, exist_ok=True)
+        writeCacheEntry(EntryDir, Columns, {
+            "File": os.path.abspath(File),
+            "Size": Size,
+            "MtimeNs": MtimeNs,
+            "Hash": Hash,
+            "Created": time.time(),
+            })
+
+        # Apply the cache size limit
+        if MaxMb > 0:
+            evictCache(CacheDir, MaxMb, EntryDir)
+
+    except OSError as Error:
+        sys.stderr.write("WARNING: Cannot write cache of %s: %s\n" % \
+            (File, Error))
+
+    return Columns
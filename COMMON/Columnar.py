@@ -0,0 +1,121 @@
+import os
+import json
+from collections import OrderedDict
+import numpy as np
+
+# Name of the file describing the columns of a columnar file
+SCHEMA_FILE = "SCHEMA.json"
+
+# Version of the columnar file layout
+COLUMNAR_VERSION = 1
+
+# A columnar file is a directory holding one raw binary file per column
+# (little-endian values, one after the other) and the schema file:
+#   {"Version": 1, "Rows": <number of rows>,
+#    "Columns": [{"Name": ..., "Type": ..., "File": ...}, ...]}
+# Only the first Rows values of each column are valid, so that a column
+# file may hold the values of an interrupted append.
+
+# Read the schema of a columnar file (None if it doesn't exist)
+def readColumnarSchema(Dir):
+    try:
+        with open(os.path.join(Dir, SCHEMA_FILE), 'r') as f:
+            Schema = json.load(f, object_pairs_hook=OrderedDict)
+
+    except OSError:
+        return None
+
+    if Schema["Version"] != COLUMNAR_VERSION:
+        raise ValueError("Unsupported columnar file version %s in %s" % \
+            (Schema["Version"], Dir))
+
+    return Schema
+
+# Write the schema of a columnar file
+# It is written to a temporary file and then renamed, so that the number
+# of rows is only updated once the values are in the column files
+def writeColumnarSchema(Dir, Schema):
+    TmpFile = os.path.join(Dir, SCHEMA_FILE + ".tmp%d" % os.getpid())
+    with open(TmpFile, 'w') as f:
+        json.dump(Schema, f, indent=1)
+    os.replace(TmpFile, os.path.join(Dir, SCHEMA_FILE))
+
+# Build the schema of the given columns
+def buildColumnarSchema(Columns):
+    Schema = OrderedDict({})
+    Schema["Version"] = COLUMNAR_VERSION
+    Schema["Rows"] = 0
+    Schema["Columns"] = []
+    for Index, (Name, Values) in enumerate(Columns.items()):
+        Schema["Columns"].append(OrderedDict([
+            ("Name", Name),
+            ("Type", np.asarray(Values).dtype.newbyteorder('<').str),
+            ("File", "COL%02d.bin" % Index),
+            ]))
+
+    return Schema
+
+# Append rows to a columnar file, creating it if needed
+# Columns is the dictionary of the values of each column, with the same
+# names and types as the existing columns
+def appendColumnar(Dir, Columns):
+    Schema = readColumnarSchema(Dir)
+    if Schema is None:
+        os.makedirs(Dir, exist_ok=True)
+        Schema = buildColumnarSchema(Columns)
+
+    # Check the columns
+    Names = [Column["Name"] for Column in Schema["Columns"]]
+    if Names != list(Columns.keys()):
+        raise ValueError("Columns %s don't match the columns %s of %s" % \
+            (list(Columns.keys()), Names, Dir))
+
+    Rows = None
+    for Column in Schema["Columns"]:
+        Values = np.ascontiguousarray(Columns[Column["Name"]],
+            dtype=np.dtype(Column["Type"]))
+        if Rows is None:
+            Rows = len(Values)
+        elif len(Values) != Rows:
+            raise ValueError("Columns of different lengths for %s" % Dir)
+
+        # Drop the values of an interrupted append and add the new ones
+        with open(os.path.join(Dir, Column["File"]), 'ab') as f:
+            f.truncate(Schema["Rows"] * Values.itemsize)
+            f.write(Values.tobytes())
+
+    Schema["Rows"] += Rows
+    writeColumnarSchema(Dir, Schema)
+
+# Write a columnar file replacing its content
+def writeColumnar(Dir, Columns):
+    if os.path.isfile(os.path.join(Dir, SCHEMA_FILE)):
+        os.remove(os.path.join(Dir, SCHEMA_FILE))
+
+    appendColumnar(Dir, Columns)
+
+# Load the columns of a columnar file
+# Returns the dictionary of the values of each column (all of them if
+# Columns is None), memory-mapped if Mmap is set
+def loadColumnar(Dir, Columns=None, Mmap=True):
+    Schema = readColumnarSchema(Dir)
+    if Schema is None:
+        raise OSError("No columnar file in %s" % Dir)
+
+    Values = OrderedDict({})
+    for Column in Schema["Columns"]:
+        if Columns is not None and Column["Name"] not in Columns:
+            continue
+
+        Type = np.dtype(Column["Type"])
+        File = os.path.join(Dir, Column["File"])
+        if Schema["Rows"] == 0:
+            Values[Column["Name"]] = np.zeros(0, dtype=Type)
+        elif Mmap:
+            Values[Column["Name"]] = np.memmap(File, dtype=Type, mode='r',
+                shape=(Schema["Rows"],))
+        else:
+            Values[Column["Name"]] = np.fromfile(File, dtype=Type,
+                count=Schema["Rows"])
+
+    return Values
@@ -1,4 +1,8 @@
 import math
+import numpy as np
+
+# Maximum number of iterations of xyz2llhArray
+XYZ2LLH_MAX_ITER = 20
 
 # Ref.: ESA_GNSS-Book_TM-23_Vol_I.pdf Section B.1.2 (Appendix B)
 def xyz2llh(x,y,z):
@@ -27,6 +31,117 @@ def xyz2llh(x,y,z):
     Rad2Deg = 180.0 / math.pi
     return clambda * Rad2Deg, theta * Rad2Deg, h
 
+# Array version of the xyz2llh iteration
+# All the rows are iterated together a fixed maximum number of times;
+# each row stops being updated when it meets the convergence criterion
+# of xyz2llh. Points on the polar axis (where xyz2llh divides by zero)
+# give NaN latitude and height.
+def xyz2llhIterative(x,y,z):
+    # --- WGS84 constants
+    a = 6378137.0
+    f = 1.0 / 298.257223563
+    # --- derived constants
+    b = a - f*a
+    e = math.sqrt(math.pow(a,2.0)-math.pow(b,2.0))/a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        clambda = np.arctan2(y,x)
+        p = np.sqrt(x*x+y*y)
+        h_old = np.zeros(len(x))
+        # first guess with h=0 meters
+        theta = np.arctan2(z,p*(1.0-math.pow(e,2.0)))
+        cs = np.cos(theta)
+        sn = np.sin(theta)
+        N = math.pow(a,2.0)/np.sqrt((a*cs)**2+(b*sn)**2)
+        h = p/cs - N
+        # rows still iterating
+        Active = np.flatnonzero(~(np.abs(h-h_old) <= 1.0e-6))
+        for Iter in range(XYZ2LLH_MAX_ITER):
+            if len(Active) == 0:
+                break
+            h_old[Active] = h[Active]
+            theta[Active] = np.arctan2(z[Active],p[Active]*\
+                (1.0-math.pow(e,2.0)*N[Active]/(N[Active]+h[Active])))
+            cs = np.cos(theta[Active])
+            sn = np.sin(theta[Active])
+            N[Active] = math.pow(a,2.0)/np.sqrt((a*cs)**2+(b*sn)**2)
+            h[Active] = p[Active]/cs - N[Active]
+            Active = Active[np.abs(h[Active]-h_old[Active]) > 1.0e-6]
+    Rad2Deg = 180.0 / math.pi
+    # no solution on the polar axis
+    Axis = p == 0
+    theta[Axis] = np.nan
+    h[Axis] = np.nan
+    return clambda * Rad2Deg, theta * Rad2Deg, h
+
+# Ref.: Bowring, B. R. (1976), Transformation from spatial to
+# geographical coordinates, Survey Review 23(181)
+# Single step of Bowring's method (no iteration)
+def xyz2llhBowring(x,y,z):
+    # --- WGS84 constants
+    a = 6378137.0
+    f = 1.0 / 298.257223563
+    # --- derived constants
+    b = a - f*a
+    e2 = f*(2.0-f)
+    ep2 = e2/(1.0-e2)
+    clambda = np.arctan2(y,x)
+    p = np.sqrt(x*x+y*y)
+    # parametric latitude
+    beta = np.arctan2(a*z,b*p)
+    theta = np.arctan2(z+ep2*b*np.sin(beta)**3, p-e2*a*np.cos(beta)**3)
+    cs = np.cos(theta)
+    sn = np.sin(theta)
+    h = p*cs + z*sn - a*np.sqrt(1.0-e2*sn*sn)
+    Rad2Deg = 180.0 / math.pi
+    return clambda * Rad2Deg, theta * Rad2Deg, h
+
+# Ref.: Vermeille, H. (2002), Direct transformation from geocentric
+# coordinates to geodetic coordinates, Journal of Geodesy 76(8)
+# Exact closed-form solution (valid outside the evolute of the ellipsoid,
+# i.e. more than ~43 km away from the Earth centre)
+def xyz2llhClosed(x,y,z):
+    # --- WGS84 constants
+    a = 6378137.0
+    f = 1.0 / 298.257223563
+    # --- derived constants
+    e2 = f*(2.0-f)
+    e4 = e2*e2
+    clambda = np.arctan2(y,x)
+    p2 = x*x+y*y
+    pn = p2/(a*a)
+    q = (1.0-e2)*z*z/(a*a)
+    r = (pn+q-e4)/6.0
+    s = e4*pn*q/(4.0*r**3)
+    t = np.cbrt(1.0+s+np.sqrt(s*(2.0+s)))
+    u = r*(1.0+t+1.0/t)
+    v = np.sqrt(u*u+e4*q)
+    w = e2*(u+v-q)/(2.0*v)
+    k = np.sqrt(u+v+w*w)-w
+    D = k*np.sqrt(p2)/(k+e2)
+    Dz = np.sqrt(D*D+z*z)
+    theta = 2.0*np.arctan2(z,D+Dz)
+    h = (k+e2-1.0)/k*Dz
+    Rad2Deg = 180.0 / math.pi
+    return clambda * Rad2Deg, theta * Rad2Deg, h
+
+# Define the ECEF to geodetic solvers of xyz2llhArray
+Xyz2llhMethods = {}
+Xyz2llhMethods["ITERATIVE"] = xyz2llhIterative
+Xyz2llhMethods["BOWRING"] = xyz2llhBowring
+Xyz2llhMethods["CLOSED"] = xyz2llhClosed
+
+# Array version of xyz2llh
+# Xyz is a Nx3 array of ECEF coordinates [m]. Returns the arrays of
+# longitudes [deg], latitudes [deg] and heights [m].
+# Method selects the solver:
+#   ITERATIVE: iteration of xyz2llh (ESA book)
+#   BOWRING:   Bowring's single step
+#   CLOSED:    Vermeille's exact closed form
+def xyz2llhArray(Xyz, Method="ITERATIVE"):
+    Xyz = np.asarray(Xyz, dtype=float)
+
+    return Xyz2llhMethods[Method](Xyz[:,0], Xyz[:,1], Xyz[:,2])
+
 # Ref.: ESA_GNSS-Book_TM-23_Vol_I.pdf Section B.1.1 (Appendix B)
 def llh2xyz(lon,lat,h):
     N = (6378137.0 / math.sqrt(1 - 0.0066943799901*(math.sin(math.radians(lat))**2)))
@@ -36,3 +151,65 @@ def llh2xyz(lon,lat,h):
     Z = ((1-0.0066943799901)*N + h)*(math.sin(math.radians(lat))) 
 
     return X,Y,Z
+
+# Array version of llh2xyz
+# Lon [deg], Lat [deg] and h [m] are arrays (or scalars) that broadcast
+# together. Returns the array of ECEF coordinates [m] with an extra last
+# axis of size 3 (i.e. Nx3 for N points).
+def llh2xyzArray(lon,lat,h):
+    lon = np.radians(lon)
+    lat = np.radians(lat)
+    cslat = np.cos(lat)
+    snlat = np.sin(lat)
+    N = (6378137.0 / np.sqrt(1 - 0.0066943799901*(snlat**2)))
+
+    X = (N+h)*(cslat*np.cos(lon))
+    Y = (N+h)*(cslat*np.sin(lon))
+    Z = ((1-0.0066943799901)*N + h)*snlat
+
+    return np.stack(np.broadcast_arrays(X,Y,Z), axis=-1)
+
+# Topocentric (East, North, Up) coordinates of satellites from stations
+# StaLlh is a Sx3 array of station lon [deg], lat [deg] and h [m] and
+# SatXyz a Mx3 array of satellite ECEF coordinates [m]. Returns the
+# SxMx3 array of ENU coordinates [m] of each satellite from each station.
+def xyz2enuArray(StaLlh, SatXyz):
+    StaLlh = np.asarray(StaLlh, dtype=float)
+    SatXyz = np.asarray(SatXyz, dtype=float)
+    StaXyz = llh2xyzArray(StaLlh[:,0], StaLlh[:,1], StaLlh[:,2])
+
+    # Line of sight vectors (stations x satellites x 3)
+    Los = SatXyz[np.newaxis,:,:] - StaXyz[:,np.newaxis,:]
+    dx = Los[:,:,0]
+    dy = Los[:,:,1]
+    dz = Los[:,:,2]
+
+    # Rotation to the local frame of each station
+    lon = np.radians(StaLlh[:,0])[:,np.newaxis]
+    lat = np.radians(StaLlh[:,1])[:,np.newaxis]
+    cslon = np.cos(lon)
+    snlon = np.sin(lon)
+    cslat = np.cos(lat)
+    snlat = np.sin(lat)
+
+    Enu = np.empty(Los.shape)
+    Enu[:,:,0] = -snlon*dx + cslon*dy
+    Enu[:,:,1] = -snlat*cslon*dx - snlat*snlon*dy + cslat*dz
+    Enu[:,:,2] = cslat*cslon*dx + cslat*snlon*dy + snlat*dz
+
+    return Enu
+
+# Azimuth and elevation of satellites from stations
+# Same inputs as xyz2enuArray. Returns the SxM arrays of azimuths
+# [deg, 0 to 360 from North to East] and elevations [deg].
+def xyz2azelArray(StaLlh, SatXyz):
+    Enu = xyz2enuArray(StaLlh, SatXyz)
+    East = Enu[:,:,0]
+    North = Enu[:,:,1]
+    Up = Enu[:,:,2]
+
+    Rad2Deg = 180.0 / math.pi
+    Azimuth = np.mod(np.arctan2(East, North) * Rad2Deg, 360.0)
+    Elevation = np.arctan2(Up, np.sqrt(East*East + North*North)) * Rad2Deg
+
+    return Azimuth, Elevation
@@ -1,6 +1,8 @@
 
 import sys, os
 from math import fmod
+import numpy as np
+from COMMON import GnssConstants
 
 # Ref.: ESA GNSS Book TM-23 Vol I Section A.1.4 in Appendix A
 def convertYearMonthDay2JulianDay(Year, Month, Day):
@@ -142,3 +144,118 @@ def convertJulianDay2EgnosEpoch(Jd):
     EgnosEpoch = (CorrectedJd - 2444244.5 - (1024.0 * 7.0)) * 86400.0
 
     return EgnosEpoch
+
+
+#>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+# ARRAY VERSIONS
+# Same algorithms as the scalar functions applied to NumPy arrays (or
+# scalars) that broadcast together. The int() truncations of the scalar
+# functions are done with np.trunc, so the results are identical.
+#>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+
+# Array version of convertYearMonthDay2JulianDay
+def convertYearMonthDay2JulianDayArray(Year, Month, Day):
+    Year = np.asarray(Year)
+    Month = np.asarray(Month)
+
+    # Fix year and month for algorithm if month number is less than 2
+    NewYear = np.where(Month > 2, Year, Year - 1)
+    NewMonth = np.where(Month > 2, Month, Month + 12)
+
+    # Compute A variable
+    A = np.trunc(NewYear / 100)
+
+    # Compute B variable
+    B = 2 - A + np.trunc(A / 4)
+
+    # Compute Julian date
+    JulianDay = np.trunc(365.25 * NewYear) + \
+                np.trunc(30.6001 * (NewMonth + 1)) + \
+                Day + 1720994.5 + B
+
+    return JulianDay
+
+# Array version of convertJulianDay2YearMonthDay
+# Returns integer arrays
+def convertJulianDay2YearMonthDayArray(JulianDay):
+    Jd2 = (np.asarray(JulianDay) + 0.5)
+    Z = np.trunc(Jd2)
+    F = np.trunc(Jd2 - Z)
+    Alpha = np.trunc((Z - 1867216.25) / 36524.25)
+    A = ((Z + 1 + Alpha) - np.trunc((Alpha) / 4.0))
+    B = (A + 1524)
+    C = np.trunc(((B) - 122.1) / 365.25)
+    D = np.trunc(365.25 * (C))
+    E = np.trunc((B - D) / 30.6001)
+
+    Day = ((B - D) - np.trunc(30.6001 * (E))) + F
+
+    Month = np.where(E < 13.5, E - 1, E - 13)
+
+    Year = np.where(Month > 2.5, C - 4716, C - 4715)
+
+    return Year.astype(np.int64), Month.astype(np.int64), \
+        Day.astype(np.int64)
+
+# Array version of convertYearMonthDay2Doy
+def convertYearMonthDay2DoyArray(Year, Month, Day):
+    Year = np.asarray(Year)
+    Month = np.asarray(Month)
+
+    # Leap year check (modulo 4, 100 and 400)
+    LeapYear = (np.mod(Year, 4) == 0) & \
+        ((np.mod(Year, 100) != 0) | (np.mod(Year, 400) == 0))
+
+    # Compute day of year using leap and non-leap year formulas
+    DayOfYear = ((np.trunc((275 * Month) / 9.0) - \
+        np.where(LeapYear, 1, 2) * np.trunc((Month + 9) / 12.0)) + Day) - 30
+
+    return DayOfYear.astype(np.int64)
+
+# Array version of convertJulianDay2EgnosEpoch
+# Jd must be an integer array
+def convertJulianDay2EgnosEpochArray(Jd):
+    Jd = np.asarray(Jd)
+    if not np.issubdtype(Jd.dtype, np.integer):
+        raise TypeError("In convertJulianDay2EgnosEpochArray: Jd not integer")
+
+    InputYear, Month, Day = convertJulianDay2YearMonthDayArray(Jd)
+
+    # Correct two-digit years: 80 to 99 are 19XX, below 80 are 20XX
+    CorrectedYear = np.where((InputYear < 100) & (InputYear >= 80),
+        InputYear + 1900,
+        np.where(InputYear < 80, InputYear + 2000, InputYear))
+
+    # Compute Julian Day
+    CorrectedJd = convertYearMonthDay2JulianDayArray(CorrectedYear, Month, Day)
+
+    # Compute EGNOS epoch
+    EgnosEpoch = (CorrectedJd - 2444244.5 - (1024.0 * 7.0)) * 86400.0
+
+    return EgnosEpoch
+
+# Julian Day of the start of the given Day of Year
+def convertYearDoy2JulianDayArray(Year, Doy):
+    return convertYearMonthDay2JulianDayArray(Year, 1, 1) + \
+        (np.asarray(Doy) - 1)
+
+# GPS week and time of week [s] from the (DOY, SoD) columns of a year
+# The week is counted from the GPS start epoch without rollover
+def convertDoySod2GpsWeekTowArray(Year, Doy, Sod):
+    # Days and seconds since the GPS start epoch
+    Days = np.rint(convertYearDoy2JulianDayArray(Year, Doy) - \
+        GnssConstants.JD_0).astype(np.int64)
+
+    Week = Days // GnssConstants.D_IN_W
+    Tow = (Days - Week * GnssConstants.D_IN_W) * GnssConstants.S_IN_D + \
+        np.asarray(Sod)
+
+    return Week, Tow
+
+# EGNOS epoch [s] from the (DOY, SoD) columns of a year
+# Same time scale as convertJulianDay2EgnosEpoch (GPS time of the
+# second 1024-week cycle)
+def convertDoySod2EgnosEpochArray(Year, Doy, Sod):
+    Jd = convertYearDoy2JulianDayArray(Year, Doy)
+
+    return (Jd - 2444244.5 - (1024.0 * 7.0)) * 86400.0 + np.asarray(Sod)
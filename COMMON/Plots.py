@@ -4,13 +4,8 @@ import matplotlib as mpl
 import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+from matplotlib.collections import LineCollection
 import numpy as np
-import conda
-CondaFileDir = conda.__file__
-CondaDir = CondaFileDir.split('lib')[0]
-ProjLib = os.path.join(os.path.join(CondaDir, 'share'), 'proj')
-os.environ["PROJ_LIB"] = ProjLib
-from mpl_toolkits.basemap import Basemap
 
 import warnings
 import matplotlib.cbook
@@ -18,21 +13,63 @@ warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
 
 import PlotsConstants as Const
 
+# Pool of idle figures
+# Figures are cleared and put back in the pool once saved, and reused
+# for the next figures of the same size, so that a run never keeps more
+# than FIGURE_POOL_SIZE figures open
+FIGURE_POOL_SIZE = 4
+FigurePool = []
+
+# Figures in use by the plot being generated
+ActiveFigures = []
+
 def createFigure(PlotConf):
+    # Reuse an idle figure of the same size
+    FigSize = PlotConf.get("FigSize", mpl.rcParams["figure.figsize"])
+    for fig in FigurePool:
+        if tuple(fig.get_size_inches()) == tuple(FigSize):
+            FigurePool.remove(fig)
+            # Make it the current figure for the pyplot calls
+            plt.figure(fig.number)
+            ax = fig.add_subplot(1, 1, 1)
+            ActiveFigures.append(fig)
+
+            return fig, ax
+
     try:
         fig, ax = plt.subplots(1, 1, figsize = PlotConf["FigSize"])
     
     except:
         fig, ax = plt.subplots(1, 1)
 
+    ActiveFigures.append(fig)
+
     return fig, ax
 
+# Clear a figure and put it back in the pool (or close it if full)
+def releaseFigure(fig):
+    if fig in ActiveFigures:
+        ActiveFigures.remove(fig)
+    fig.clf()
+    if len(FigurePool) < FIGURE_POOL_SIZE:
+        FigurePool.append(fig)
+
+    else:
+        plt.close(fig)
+
+# Resolution of the saved figures [dots per inch]
+SAVE_DPI = 150.
+
 def saveFigure(fig, Path):
     Dir = os.path.dirname(Path)
     try:
         os.makedirs(Dir)
     except: pass
-    fig.savefig(Path, dpi=150., bbox_inches='tight')
+    try:
+        fig.savefig(Path, dpi=SAVE_DPI, bbox_inches='tight')
+
+    finally:
+        releaseFigure(fig)
 
 def prepareAxis(PlotConf, ax):
     for key in PlotConf:
@@ -107,36 +144,207 @@ def prepareColorBar(PlotConf, ax, Values):
 
     return normalize, cmap
 
-def drawMap(PlotConf, ax,):
-    Map = Basemap(projection = 'cyl',
-    llcrnrlat  = PlotConf["LatMin"]-0,
-    urcrnrlat  = PlotConf["LatMax"]+0,
-    llcrnrlon  = PlotConf["LonMin"]-0,
-    urcrnrlon  = PlotConf["LonMax"]+0,
-    lat_ts     = 10,
-    resolution = 'l',
-    ax         = ax)
+# Cache of the map backgrounds of the process
+# Keyed by the lon/lat box, the meridians/parallels steps and the
+# coastline resolution. Each background keeps the Basemap instance and
+# its coastline and country segments as arrays, so that map figures only
+# build the Basemap and extract the boundaries once.
+MapCache = {}
+
+# Import Basemap (and set up PROJ from conda) for the first map figure
+def importBasemap():
+    import conda
+    CondaFileDir = conda.__file__
+    CondaDir = CondaFileDir.split('lib')[0]
+    ProjLib = os.path.join(os.path.join(CondaDir, 'share'), 'proj')
+    os.environ["PROJ_LIB"] = ProjLib
+    from mpl_toolkits.basemap import Basemap
+
+    return Basemap
+
+def getMapBackground(PlotConf):
+    Resolution = PlotConf.get("MapResolution", 'l')
+    Key = (PlotConf["LonMin"], PlotConf["LonMax"],
+        PlotConf["LatMin"], PlotConf["LatMax"],
+        PlotConf["LonStep"], PlotConf["LatStep"], Resolution)
+
+    if Key not in MapCache:
+        Basemap = importBasemap()
+        Map = Basemap(projection = 'cyl',
+        llcrnrlat  = PlotConf["LatMin"]-0,
+        urcrnrlat  = PlotConf["LatMax"]+0,
+        llcrnrlon  = PlotConf["LonMin"]-0,
+        urcrnrlon  = PlotConf["LonMax"]+0,
+        lat_ts     = 10,
+        resolution = Resolution)
+
+        Background = {}
+        Background["Map"] = Map
+
+        # Meridians and parallels
+        Background["Meridians"] = np.arange(PlotConf["LonMin"],
+            PlotConf["LonMax"]+1, PlotConf["LonStep"])
+        Background["Parallels"] = np.arange(PlotConf["LatMin"],
+            PlotConf["LatMax"]+1, PlotConf["LatStep"])
+
+        # Coastline and country segments clipped to the map box
+        # (same boundaries as drawcoastlines and drawcountries)
+        # The countries are drawn once on a template axis, outside of
+        # pyplot, to get the segments of the returned LineCollection
+        Background["Coastlines"] = \
+            [np.array(Segment) for Segment in Map.coastsegs]
+        TemplateAx = mpl.figure.Figure().add_subplot(111)
+        Background["Countries"] = \
+            Map.drawcountries(ax=TemplateAx).get_segments()
+
+        MapCache[Key] = Background
+
+    return MapCache[Key]
 
+def drawMap(PlotConf, ax,):
+    Background = getMapBackground(PlotConf)
+    Map = Background["Map"]
 
     # Draw map meridians
     Map.drawmeridians(
-    np.arange(PlotConf["LonMin"],PlotConf["LonMax"]+1,PlotConf["LonStep"]),
+    Background["Meridians"],
     labels = [0,0,0,1],
     fontsize = 6,
-    linewidth=0.2)
+    linewidth=0.2,
+    ax = ax)
         
     # Draw map parallels
     Map.drawparallels(
-    np.arange(PlotConf["LatMin"],PlotConf["LatMax"]+1,PlotConf["LatStep"]),
+    Background["Parallels"],
     labels = [1,0,0,0],
     fontsize = 6,
-    linewidth=0.2)
+    linewidth=0.2,
+    ax = ax)
 
     # Draw coastlines
-    Map.drawcoastlines(linewidth=0.5)
+    Coastlines = LineCollection(Background["Coastlines"],
+        colors='k', linewidths=0.5, label='_nolabel_')
+    ax.add_collection(Coastlines)
 
     # Draw countries
-    Map.drawcountries(linewidth=0.25)
+    Countries = LineCollection(Background["Countries"],
+        colors='k', linewidths=0.25, label='_nolabel_')
+    ax.add_collection(Countries)
+
+    # Set axes limits to fit map region
+    Map.set_axes_limits(ax=ax)
+
+# Density rendering of the Lines plots with ColorBar
+# Above DENSITY_MIN_POINTS points (or if PlotConf["Density"] is set), the
+# points are not drawn one by one (the map plots are only drawn in density
+# mode if PlotConf["Density"] is set): they are binned into a grid of cells
+# of DENSITY_CELL_PIXELS pixels of the saved figure and each cell is
+# coloured by the reduction of the z values of its points
+# (PlotConf["DensityReduce"]: "MAX", "MEAN" or "COUNT", the number of
+# points), drawn as a single image
+DENSITY_MIN_POINTS = 200000
+DENSITY_CELL_PIXELS = 2
+DENSITY_REDUCTIONS = ("MAX", "MEAN", "COUNT")
+
+# Check whether a Lines plot is drawn in density mode
+def isDensityPlot(PlotConf):
+    if "ColorBar" not in PlotConf:
+        return False
+
+    if "Density" in PlotConf:
+        return bool(PlotConf["Density"])
+
+    # The automatic switch does not apply to the map plots
+    if PlotConf.get("Map") == True:
+        return False
+
+    NPoints = sum(len(Values) for Values in PlotConf["yData"].values())
+
+    return NPoints > PlotConf.get("DensityMinPoints", DENSITY_MIN_POINTS)
+
+# Get the values of all the labels of the plot as floats
+# The values are converted with the units of the axis, as scatter does
+# (i.e: PRN names are placed on a categorical axis)
+def getDensityValues(PlotConf, Data, axis):
+    Values = []
+    for Label in PlotConf["yData"].keys():
+        LabelValues = PlotConf[Data][Label]
+        if axis is not None:
+            axis.update_units(LabelValues)
+            LabelValues = axis.convert_units(LabelValues)
+        Values.append(np.asarray(LabelValues, dtype=float))
+
+    return np.concatenate(Values) if Values else np.zeros(0)
+
+# Get the limits of the density grid along one axis: the axis limits of
+# the plot if set, or the range of the values
+def getDensityLimits(PlotConf, Axis, Values):
+    if Axis + "Lim" in PlotConf:
+        return [float(Limit) for Limit in PlotConf[Axis + "Lim"]]
+
+    if len(Values) == 0:
+        return [0., 1.]
+
+    Min, Max = float(np.min(Values)), float(np.max(Values))
+    if Min == Max:
+        Min, Max = Min - 0.5, Max + 0.5
+
+    return [Min, Max]
+
+# Bin the points of the plot into the cells of the axes
+# Returns the grid of the cells (masked where there are no points) and
+# its extent [xMin, xMax, yMin, yMax]
+def computeDensityGrid(PlotConf, fig, ax):
+    Reduce = PlotConf.get("DensityReduce", "MAX")
+    if Reduce not in DENSITY_REDUCTIONS:
+        raise ValueError("Unknown DensityReduce %s (%s)" % \
+            (Reduce, ", ".join(DENSITY_REDUCTIONS)))
+
+    x = getDensityValues(PlotConf, "xData", ax.xaxis)
+    y = getDensityValues(PlotConf, "yData", ax.yaxis)
+    z = getDensityValues(PlotConf, "zData", None)
+    Valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(z)
+    x, y, z = x[Valid], y[Valid], z[Valid]
+
+    # Size of the grid from the size of the axes in the saved figure
+    Width, Height = fig.get_size_inches()
+    Position = ax.get_position()
+    CellPixels = PlotConf.get("DensityCellPixels", DENSITY_CELL_PIXELS)
+    NCols = max(int(Width * Position.width * SAVE_DPI / CellPixels), 1)
+    NRows = max(int(Height * Position.height * SAVE_DPI / CellPixels), 1)
+
+    # Cell of each point inside the limits
+    xLim = getDensityLimits(PlotConf, "x", x)
+    yLim = getDensityLimits(PlotConf, "y", y)
+    Cols = np.floor((x - xLim[0]) * (NCols / (xLim[1] - xLim[0])))
+    Rows = np.floor((y - yLim[0]) * (NRows / (yLim[1] - yLim[0])))
+    # Points on the upper limits go to the last cells
+    Cols[x == xLim[1]] = NCols - 1
+    Rows[y == yLim[1]] = NRows - 1
+    Inside = (Cols >= 0) & (Cols < NCols) & (Rows >= 0) & (Rows < NRows)
+    Cells = Rows[Inside].astype('int64') * NCols + Cols[Inside].astype('int64')
+    z = z[Inside]
+
+    # Reduce the z values of each cell
+    Count = np.bincount(Cells, minlength=NRows * NCols)
+    if Reduce == "COUNT":
+        Grid = Count.astype(float)
+    elif Reduce == "MEAN":
+        Grid = np.bincount(Cells, weights=z, minlength=NRows * NCols) / \
+            np.maximum(Count, 1)
+    else:
+        Grid = np.full(NRows * NCols, -np.inf)
+        np.maximum.at(Grid, Cells, z)
+
+    Grid = np.ma.masked_array(Grid.reshape(NRows, NCols),
+        mask=(Count == 0).reshape(NRows, NCols))
+
+    return Grid, xLim + yLim
+
+# Draw the density grid of the plot as an image
+def drawDensityGrid(ax, Grid, Extent, normalize, cmap):
+    ax.imshow(Grid, origin='lower', extent=Extent, aspect='auto',
+        interpolation='nearest', cmap=cmap, norm=normalize)
 
 def generateLinesPlot(PlotConf):
     LineWidth = 1.5
@@ -145,31 +353,49 @@ def generateLinesPlot(PlotConf):
 
     prepareAxis(PlotConf, ax)
 
+    # Bin the points of the density plots
+    Density = isDensityPlot(PlotConf)
+    ColorBarConf = PlotConf
+    if Density:
+        Grid, Extent = computeDensityGrid(PlotConf, fig, ax)
+        if PlotConf.get("DensityReduce", "MAX") == "COUNT":
+            ColorBarConf = dict(PlotConf)
+            ColorBarConf["ColorBarLabel"] = "Number of points"
+            ColorBarConf["ColorBarMin"] = 0.
+            ColorBarConf["ColorBarMax"] = \
+                float(Grid.max()) if Grid.count() > 0 else 1.
+
     for key in PlotConf:
         if key == "LineWidth":
             LineWidth = PlotConf["LineWidth"]
         if key == "ColorBar":
-            normalize, cmap = prepareColorBar(PlotConf, ax, PlotConf["zData"])
+            normalize, cmap = prepareColorBar(ColorBarConf, ax,
+                PlotConf["zData"])
         if key == "Map" and PlotConf[key] == True:
             drawMap(PlotConf, ax)
       
 
-    for Label in PlotConf["yData"].keys():
-        if "ColorBar" in PlotConf:
-            ax.scatter(PlotConf["xData"][Label], PlotConf["yData"][Label], 
-            marker = PlotConf["Marker"],
-            linewidth = LineWidth,
-            s = LineWidth,
-            c = cmap(normalize(np.array(PlotConf["zData"][Label]))))
-           
-
-        else:
-            ax.plot(PlotConf["xData"][Label], PlotConf["yData"][Label],
-            PlotConf["Marker"],
-            linewidth = LineWidth)
-
-    if "Legend" in PlotConf:
-            ax.legend(PlotConf["yData"].keys(), loc ='best')
+    # The density image replaces the points (and their legend)
+    if Density:
+        drawDensityGrid(ax, Grid, Extent, normalize, cmap)
+
+    else:
+        for Label in PlotConf["yData"].keys():
+            if "ColorBar" in PlotConf:
+                ax.scatter(PlotConf["xData"][Label], PlotConf["yData"][Label], 
+                marker = PlotConf["Marker"],
+                linewidth = LineWidth,
+                s = LineWidth,
+                c = cmap(normalize(np.array(PlotConf["zData"][Label]))))
+               
+
+            else:
+                ax.plot(PlotConf["xData"][Label], PlotConf["yData"][Label],
+                PlotConf["Marker"],
+                linewidth = LineWidth)
+
+        if "Legend" in PlotConf:
+                ax.legend(PlotConf["yData"].keys(), loc ='best')
 
     try:
         ax.get_yaxis().get_major_formatter().set_useOffset(False)
@@ -247,13 +473,20 @@ def generateBar2Plot(PlotConf):
     
 
     saveFigure(fig, PlotConf["Path"])
-
-    plt.show()
         
         
   
 #////////////////////////////////////////////////
 def generatePlot(PlotConf):
+    try:
+        generatePlotType(PlotConf)
+
+    finally:
+        # Release the figures of a plot that failed before being saved
+        for fig in list(ActiveFigures):
+            releaseFigure(fig)
+
+def generatePlotType(PlotConf):
     if(PlotConf["Type"] == "Lines"):
         generateLinesPlot(PlotConf)
     elif(PlotConf["Type"] == "Bar"):
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+########################################################################
+# SatAggregate.py:
+# This function builds the weekly or monthly Satellite Statistics
+#
+#  Project:        SBPT
+#  File:           SatAggregate.py
+#
+# Usage:
+# i.e: SatAggregate.py $SCEN_PATH WEEK|MONTH
+#
+# The Statistics accumulators of each day of the scenario dates must
+# have been saved by SatPerformances.py (SAVE_SAT_ACCUM = 1). They are
+# merged by GPS week or by month, without reading the SAT INFO files,
+# into the files:
+#   OUT/SAT/SAT_STAT_W<GPS week>_G123_<TSTEP>s.dat
+#   OUT/SAT/SAT_STAT_Y<YY>M<MM>_G123_<TSTEP>s.dat
+# together with the merged accumulators (SAT_ACCUM_*.npz).
+#
+# Internal dependencies:
+#   SatFunctions.py
+#   SatPerformances.py
+#   COMMON
+########################################################################
+
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+import sys, os
+from collections import OrderedDict
+import numpy as np
+from SatFunctions import readSatAccum
+from SatFunctions import writeSatAccum
+from SatFunctions import mergeSatAccum
+from SatFunctions import buildSatStats
+from SatFunctions import writeSatStats
+from SatPerformances import readConf
+from SatPerformances import processConf
+from SatPerformances import getDayFiles
+from SatPerformances import getAccumFile
+from COMMON.Dates import convertJulianDay2YearMonthDay
+from COMMON.Dates import convertYearMonthDay2Doy
+from COMMON.Dates import convertDoySod2GpsWeekTowArray
+
+
+#----------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+#----------------------------------------------------------------------
+
+def displayUsage():
+    sys.stderr.write("ERROR: Please provide path to SCENARIO and the "
+        "period (WEEK or MONTH) as arguments\n")
+
+# Function to get the label of the period (week or month) of a day
+def getPeriodLabel(Period, Jd):
+    Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
+
+    if Period == "WEEK":
+        Doy = convertYearMonthDay2Doy(Year, Month, Day)
+        Week, Tow = convertDoySod2GpsWeekTowArray(Year, Doy, 0)
+
+        return 'W%04d' % Week
+
+    return 'Y%02dM%02d' % (Year % 100, Month)
+
+# Function to merge the Statistics accumulators of the days of a period
+# Returns the merged accumulators and the Julian Days merged
+def mergePeriod(Scen, Conf, Jds):
+    Accum = None
+    Merged = []
+    for Jd in Jds:
+        Doy, SatFile, EntGpsFile, SatStatsFile = getDayFiles(Scen, Conf, Jd)
+        AccumFile = getAccumFile(SatFile)
+        if not os.path.isfile(AccumFile):
+            sys.stderr.write("WARNING: Missing accumulators %s\n" % \
+                AccumFile)
+            continue
+
+        DayAccum, Extra = readSatAccum(AccumFile)
+        Accum = DayAccum if Accum is None else mergeSatAccum(Accum, DayAccum)
+        Merged.append(Jd)
+
+    return Accum, Merged
+
+#######################################################
+# MAIN BODY
+#######################################################
+
+if __name__ == "__main__":
+
+    # Check Input Arguments
+    if len(sys.argv) != 3 or sys.argv[2] not in ("WEEK", "MONTH"):
+        displayUsage()
+        sys.exit(1)
+
+    # Extract the arguments
+    Scen = sys.argv[1]
+    Period = sys.argv[2]
+
+    # Read and process the conf file
+    Conf = processConf(readConf(Scen + '/CFG/satperformances.cfg'))
+
+    print('------------------------------------')
+    print('--> RUNNING SAT-STATISTICS AGGREGATION:')
+    print('------------------------------------')
+
+    # Group the Julian Days in simulation by period
+    Periods = OrderedDict({})
+    for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
+        Periods.setdefault(getPeriodLabel(Period, Jd), []).append(Jd)
+
+    Failed = []
+    for Label, Jds in Periods.items():
+        print('\n*** Merging Period: ', Label, '...***')
+
+        Accum, Merged = mergePeriod(Scen, Conf, Jds)
+        if Accum is None:
+            sys.stderr.write("ERROR: No accumulators for period %s\n" % \
+                Label)
+            Failed.append(Label)
+            continue
+
+        print('1. Merged %d of %d days' % (len(Merged), len(Jds)))
+
+        # Define the names of the Output files of the period
+        SatStatsFile = Scen + \
+            '/OUT/SAT/' + 'SAT_STAT_%s_G123_%ss.dat' % (Label, Conf["TSTEP"])
+        AccumFile = getAccumFile(SatStatsFile.replace("STAT", "INFO"))
+
+        # Write the Statistics and the merged accumulators
+        writeSatStats(SatStatsFile, buildSatStats(Accum))
+        writeSatAccum(AccumFile, Accum,
+            OrderedDict({"Jds": np.array(Merged, dtype='int64')}))
+
+        print('2. Created files:', SatStatsFile, AccumFile)
+
+    print('------------------------------------')
+    print('--> END OF SAT-STATISTICS AGGREGATION:')
+    print('------------------------------------')
+
+    if len(Failed) > 0:
+        sys.exit(1)
+
+#######################################################
+#END OF SAT AGGREGATE MODULE
+#######################################################
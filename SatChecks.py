@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+########################################################################
+# SatChecks.py:
+# This function runs the consistency checks of the SAT modules
+#
+#  Project:        SBPT
+#  File:           SatChecks.py
+#
+# Usage:
+# i.e: SatChecks.py [CHECK ...]
+# Runs all the checks if none is given
+# Exits with status 1 if a check fails
+#
+# Checks:
+#   engines: The Statistics engines (LEGACY, VECTOR and the chunked
+#            streaming mode) write identical STAT and ENT-GPS files
+#   imports: The SAT modules are imported without the plotting stack
+#
+# Internal dependencies:
+#   SatFunctions.py
+#   SatPlots.py
+#   SatPerformances.py
+########################################################################
+
+
+# Import External and Internal functions and Libraries
+#----------------------------------------------------------------------
+import sys, os
+import json, subprocess
+import tempfile, shutil
+from collections import OrderedDict
+import numpy as np
+from SatFunctions import computeSatStats
+
+
+#----------------------------------------------------------------------
+# INTERNAL FUNCTIONS
+#----------------------------------------------------------------------
+
+# Header of the SAT INFO files
+SAT_INFO_HEADER = "#SoD DOY PRN SAT-X SAT-Y SAT-Z MONSTAT SRESTAT SREx SREy " \
+    "SREz SREb1 SREW SFLT-W UDREI FC AF0 AF1 LTCx LTCy LTCz NRIMS RDOP\n"
+
+# Write a SAT INFO file of NEpochs epochs with random values
+# (NEpochs = 0 gives a file with only the header line)
+def writeSatInfoSample(SatFile, NEpochs, Tstep=10, Seed=0):
+    Rng = np.random.default_rng(Seed)
+    Prns = ["G%02d" % Prn for Prn in range(1, 33)] + \
+        ["E%02d" % Prn for Prn in range(1, 9)]
+    MonStat = np.ones(len(Prns), dtype=int)
+    Lines = [SAT_INFO_HEADER]
+    for Epoch in range(NEpochs):
+        # Change the monitoring status of some satellites
+        Flip = Rng.random(len(Prns)) < 0.02
+        MonStat[Flip] = Rng.choice([1, 0, -1], np.sum(Flip))
+        for Sat in np.flatnonzero(Rng.random(len(Prns)) < 0.7):
+            Lines.append("%5d %3d %3s %14.3f %14.3f %14.3f %2d %2d "
+                "%8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %2d %8.3f %8.3f "
+                "%10.6f %8.3f %8.3f %8.3f %3d %8.3f\n" % ((Epoch * Tstep,
+                14, Prns[Sat]) + tuple(Rng.uniform(-26560, 26560, 3)) +
+                (MonStat[Sat], Rng.random() < 0.9) +
+                tuple(Rng.normal(0, 0.5, 4)) +
+                (abs(Rng.normal(0, 0.6)), Rng.uniform(0.5, 5),
+                Rng.integers(0, 14)) + tuple(Rng.normal(0, 1, 2)) +
+                (Rng.normal(0, 1e-3),) + tuple(Rng.normal(0, 2, 3)) +
+                (Rng.integers(5, 40), Rng.uniform(1, 100))))
+
+    with open(SatFile, 'w') as f:
+        f.writelines(Lines)
+
+# Check that the Statistics engines (LEGACY, VECTOR and the chunked
+# streaming mode) write identical STAT and ENT-GPS files, for a sample
+# day and for a SAT INFO file without samples
+# Returns False if the files differ
+def checkSatStatsEngines(NEpochs=360):
+    Engines = OrderedDict({})
+    Engines["LEGACY"] = {"Engine": "LEGACY"}
+    Engines["VECTOR"] = {"Engine": "VECTOR"}
+    Engines["CHUNKED"] = {"Engine": "VECTOR", "ChunkRows": 1000}
+
+    Ok = True
+    TmpDir = tempfile.mkdtemp()
+    try:
+        for Case, Epochs in (("Sample day", NEpochs), ("Header only", 0)):
+            SatFile = os.path.join(TmpDir, "SAT_INFO.dat")
+            writeSatInfoSample(SatFile, Epochs)
+
+            Outputs = OrderedDict({})
+            for Engine, Args in Engines.items():
+                EntGpsFile = os.path.join(TmpDir, "ENTGPS_%s.dat" % Engine)
+                SatStatsFile = os.path.join(TmpDir, "STAT_%s.dat" % Engine)
+                computeSatStats(SatFile, EntGpsFile, SatStatsFile, **Args)
+                with open(EntGpsFile, 'rb') as f1, \
+                    open(SatStatsFile, 'rb') as f2:
+                    Outputs[Engine] = (f1.read(), f2.read())
+
+            Identical = [Engine for Engine in Engines \
+                if Outputs[Engine] == Outputs["LEGACY"]]
+            print("  %-12s %d epochs: identical to LEGACY: %s" % \
+                (Case, Epochs, ", ".join(Identical)))
+            Ok &= len(Identical) == len(Engines)
+
+    finally:
+        shutil.rmtree(TmpDir, ignore_errors=True)
+
+    print("  %s\n" % ("OK" if Ok else "FAILED: different files"))
+
+    return Ok
+
+# Modules of the plotting stack
+PLOT_MODULES = ("matplotlib", "mpl_toolkits", "conda", "COMMON.Plots")
+
+# Check the import of the SAT modules in a new interpreter
+# The plotting stack must not be imported and the import must take less
+# than MaxSeconds. Returns False if the check fails.
+def checkImports(MaxSeconds=3.0):
+    SatDir = os.path.dirname(os.path.abspath(__file__))
+    # Only the modules loaded by the import are considered (site
+    # packages may preload namespace packages such as mpl_toolkits)
+    Code = "import sys, time, json\n" \
+        "Before = set(sys.modules)\n" \
+        "Start = time.perf_counter()\n" \
+        "import SatFunctions, SatPlots, SatPerformances\n" \
+        "Elapsed = time.perf_counter() - Start\n" \
+        "print(json.dumps([Elapsed, sorted(m for m in sys.modules " \
+        "if m not in Before and " \
+        "(m.split('.')[0] in %r or m in %r))]))" % \
+        (PLOT_MODULES, PLOT_MODULES)
+
+    Output = subprocess.run([sys.executable, "-c", Code], cwd=SatDir,
+        stdout=subprocess.PIPE, check=True).stdout
+    Elapsed, Modules = json.loads(Output.decode().strip().splitlines()[-1])
+
+    print("  Import time of SatFunctions, SatPlots, SatPerformances: "
+        "%.3f s (max %.1f s)" % (Elapsed, MaxSeconds))
+    print("  Plotting modules imported: %s" % (", ".join(Modules) or "none"))
+
+    Ok = len(Modules) == 0 and Elapsed <= MaxSeconds
+    print("  %s\n" % ("OK" if Ok else "FAILED"))
+
+    return Ok
+
+# Define the checks
+Checks = OrderedDict({})
+Checks["engines"] = checkSatStatsEngines
+Checks["imports"] = checkImports
+
+#######################################################
+# MAIN BODY
+#######################################################
+
+if __name__ == "__main__":
+
+    # Select the checks to run
+    Names = sys.argv[1:] if len(sys.argv) > 1 else list(Checks.keys())
+
+    for Name in Names:
+        if Name not in Checks:
+            sys.stderr.write("ERROR: Unknown check %s (%s)\n" % \
+                (Name, ", ".join(Checks.keys())))
+            sys.exit(1)
+
+    Failed = []
+    for Name in Names:
+        print("=== %s ===" % Name)
+        if Checks[Name]() is False:
+            Failed.append(Name)
+
+    if len(Failed) > 0:
+        sys.stderr.write("ERROR: Failed checks: %s\n" % ", ".join(Failed))
+        sys.exit(1)
+
+#######################################################
+#END OF SAT CHECKS MODULE
+#######################################################
@@ -19,14 +19,24 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 import sys, os
+import hashlib
+from io import BytesIO
+from itertools import islice
 # Add path to find all modules
 Common = os.path.dirname(os.path.dirname(
     os.path.abspath(sys.argv[0]))) + '/COMMON'
 sys.path.insert(0, Common)
 from collections import OrderedDict
 from COMMON import GnssConstants
-from math import sqrt
+from COMMON.Cache import readCachedColumns
+from COMMON.Cache import updateFileHash
+from COMMON.Columnar import readColumnarSchema
+from COMMON.Columnar import appendColumnar
+from COMMON.Columnar import writeColumnar
+from COMMON.Columnar import loadColumnar
 import numpy as np
+from pandas import read_csv, DataFrame
+from pandas.errors import EmptyDataError
 
 # Define SAT INFO FILE Columns
 SatIdx= OrderedDict({})
@@ -54,6 +64,79 @@ SatIdx["LTCz"]=20
 SatIdx["NRIMS"]=21
 SatIdx["RDOP"]=22
 
+# Define SAT INFO FILE Column types used by the columnar reader
+SatTypes = OrderedDict({})
+SatTypes["SoD"]='int32'
+SatTypes["DOY"]='int32'
+SatTypes["PRN"]='int32'
+SatTypes["SAT-X"]='float64'
+SatTypes["SAT-Y"]='float64'
+SatTypes["SAT-Z"]='float64'
+SatTypes["MONSTAT"]='int8'
+SatTypes["SRESTAT"]='int8'
+SatTypes["SREx"]='float64'
+SatTypes["SREy"]='float64'
+SatTypes["SREz"]='float64'
+SatTypes["SREb1"]='float64'
+SatTypes["SREW"]='float64'
+SatTypes["SFLT-W"]='float64'
+SatTypes["UDREI"]='int16'
+SatTypes["FC"]='float64'
+SatTypes["AF0"]='float64'
+SatTypes["AF1"]='float64'
+SatTypes["LTCx"]='float64'
+SatTypes["LTCy"]='float64'
+SatTypes["LTCz"]='float64'
+SatTypes["NRIMS"]='int16'
+SatTypes["RDOP"]='float64'
+
+# Define SAT INFO FILE Columns needed to compute the Satellite Statistics
+SatStatsCols = ["SoD", "PRN", "SAT-X", "SAT-Y", "SAT-Z", "MONSTAT",
+    "SRESTAT", "SREx", "SREy", "SREz", "SREb1", "SREW", "SFLT-W", "FC",
+    "AF0", "LTCx", "LTCy", "LTCz", "NRIMS"]
+
+# Define Constellation codes used to encode the PRN labels into integers:
+# PRN code = Constellation code * PRN_CODE_BASE + PRN number
+# i.e: G01 -> 1, E05 -> 1005
+ConstCode = OrderedDict({})
+ConstCode["G"]=0
+ConstCode["E"]=1
+ConstCode["R"]=2
+ConstCode["C"]=3
+ConstCode["J"]=4
+ConstCode["S"]=5
+PRN_CODE_BASE = 1000
+
+# Define the Statistics accumulators of each satellite
+# (type, initial value, shape of the values of each satellite and the
+# function merging the values of two accumulators, see mergeSatAccum;
+# None keeps the values of the later accumulator)
+SatAccumVars = OrderedDict({})
+SatAccumVars["NSAMPS"] = ('int64', 0, (), np.add)
+SatAccumVars["MON"] = ('float64', 0.0, (), np.add)
+SatAccumVars["NTRANS"] = ('int64', 0, (), np.add)
+SatAccumVars["SREWSAMPS"] = ('int64', 0, (), np.add)
+SatAccumVars["NMI"] = ('float64', 0.0, (), np.add)
+SatAccumVars["RIMS-MIN"] = ('float64', 1e12, (), np.minimum)
+SatAccumVars["RIMS-MAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["SREWMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["SFLTMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["SFLTMIN"] = ('float64', 1e12, (), np.minimum)
+SatAccumVars["SIMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["FCMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["LTCbMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["LTCxMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["LTCyMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["LTCzMAX"] = ('float64', 0.0, (), np.maximum)
+SatAccumVars["SREaSUM2"] = ('float64', 0.0, (), np.add)
+SatAccumVars["SREcSUM2"] = ('float64', 0.0, (), np.add)
+SatAccumVars["SRErSUM2"] = ('float64', 0.0, (), np.add)
+SatAccumVars["SREbSUM2"] = ('float64', 0.0, (), np.add)
+SatAccumVars["SREWSUM2"] = ('float64', 0.0, (), np.add)
+SatAccumVars["SODPREV"] = ('int64', 0, (), None)
+SatAccumVars["MONPREV"] = ('bool', False, (), None)
+SatAccumVars["POSPREV"] = ('float64', 0.0, (3,), None)
+
 # Define SAT STATISTICS file Columns
 SatStatsIdx = OrderedDict({})
 SatStatsIdx["PRN"]=0
@@ -142,63 +225,240 @@ def readSatInfoEpoch(f):
 
     return EpochInfo
 
-# FUNCTION: Initialized Output Statistics
+# FUNCTION: Encode PRN labels into integer PRN codes
 #-----------------------------------------------------------------------
 
-def initializeOutputs(Outputs):
-    
-    # Loop over GPS and Galileo Satellites
-    for Const in ['G', 'E']:
-        
-        # Loop over all satellites of each constellation 
-        for Prn in range(1,33):
+def encodePrn(PrnLabels):
+    # Get the different labels and the position of each sample
+    Labels, Inverse = np.unique(np.asarray(PrnLabels, dtype=str),
+        return_inverse=True)
 
-            SatLabel = Const + "%02d" % Prn
-            Outputs[SatLabel] = OrderedDict({})
-            for var in SatStatsIdx.keys():
-                
-                if (var == "PRN"):
-                    Outputs[SatLabel][var] = SatLabel
-                
-                elif (var == "RIMS-MIN"):
-                    Outputs[SatLabel][var] = 1e12
-                
-                elif (var == "SFLTMIN"):
-                    Outputs[SatLabel][var] = 1e12
+    # Encode only the different labels
+    Codes = np.array([
+        ConstCode[Label[0]] * PRN_CODE_BASE + int(Label[1:])
+        for Label in Labels], dtype=SatTypes["PRN"])
 
-                else:
-                    Outputs[SatLabel][var] = 0.0
+    return Codes[Inverse.reshape(-1)]
 
-# FUNCTION: Initialize Intermediate Outputs
+# FUNCTION: Decode integer PRN codes into PRN labels
 #-----------------------------------------------------------------------
 
-def initializeInterOutputs(InterOutputs):
-    
-    # Loop over GPS and Galileo Satellites
-    for Const in ['G', 'E']:
-        
-        for Prn in range(1,33):
-
-            SatLabel = Const + "%02d" % Prn
-            InterOutputs[SatLabel] = OrderedDict({})
-            InterOutputs[SatLabel]["NSAMPS"] = 0
-            InterOutputs[SatLabel]["SODPREV"] = 0
-            InterOutputs[SatLabel]["MONPREV"] = 0
-            InterOutputs[SatLabel]["SREb"] = 0
-            InterOutputs[SatLabel]["SREbSUM2"] = 0
-            InterOutputs[SatLabel]["SREaSUM2"] = 0
-            InterOutputs[SatLabel]["SREcSUM2"] = 0
-            InterOutputs[SatLabel]["SRErSUM2"] = 0
-            InterOutputs[SatLabel]["SREACRSAMPS"] = 0
-            InterOutputs[SatLabel]["SREWSUM2"] = 0
-            InterOutputs[SatLabel]["SREWSAMPS"] = 0
-            InterOutputs[SatLabel]["XPREV"] = 0
-            InterOutputs[SatLabel]["YPREV"] = 0
-            InterOutputs[SatLabel]["ZPREV"] = 0
-
-    InterOutputs["ENT-GPS"] = 0
-
-    return
+def decodePrn(PrnCodes):
+    # Build the inverse of the Constellation codes
+    CodeConst = dict((Code, Const) for Const, Code in ConstCode.items())
+
+    return [CodeConst[int(Code) // PRN_CODE_BASE] + \
+        "%02d" % (int(Code) % PRN_CODE_BASE) for Code in PrnCodes]
+
+# FUNCTION: Compute the Epoch boundaries
+#-----------------------------------------------------------------------
+
+def computeEpochOffsets(Sod):
+    # Epoch k is made of rows EpochOffsets[k]:EpochOffsets[k+1]
+    if len(Sod) == 0:
+        return np.zeros(1, dtype='int64')
+
+    NewEpoch = np.flatnonzero(Sod[1:] != Sod[:-1]) + 1
+
+    return np.concatenate(([0], NewEpoch, [len(Sod)])).astype('int64')
+
+# FUNCTION: Get the columns and types to read from the Sat Info file
+#-----------------------------------------------------------------------
+
+def getSatInfoReadTypes(Columns=None):
+    # By default read all the columns
+    if Columns is None:
+        Columns = list(SatIdx.keys())
+
+    # SoD is always needed to build the epoch boundaries
+    Columns = [Var for Var in SatIdx.keys() \
+        if Var in Columns or Var == "SoD"]
+
+    # Define the type of each column, PRN is read as categorical
+    # so that only the different labels are encoded
+    Types = {}
+    for Var in Columns:
+        if Var == "PRN":
+            Types[SatIdx[Var]] = 'category'
+        else:
+            Types[SatIdx[Var]] = SatTypes[Var]
+
+    return Columns, Types
+
+# FUNCTION: Build the typed columns from the rows read with read_csv
+#-----------------------------------------------------------------------
+
+def buildSatInfoColumns(Data, Columns):
+    # Build the columns keyed by the SatIdx names
+    SatInfo = OrderedDict({})
+    for Var in Columns:
+        if Var == "PRN":
+            Prn = Data[SatIdx[Var]].cat
+            Codes = encodePrn(Prn.categories)
+            SatInfo[Var] = Codes[Prn.codes.astype('int64')]
+        else:
+            SatInfo[Var] = Data[SatIdx[Var]].to_numpy()
+
+    return SatInfo
+
+# FUNCTION: Read the whole Sat Info file into typed columns
+#-----------------------------------------------------------------------
+
+def readSatInfoFile(SatFile, Columns=None):
+    Columns, Types = getSatInfoReadTypes(Columns)
+
+    # Read the file skipping the header line
+    # (high precision parsing gives the same values as float() for the
+    # fixed-point fields of the file, at the same speed as the default
+    # parser: the time is spent splitting the fields, even those not in
+    # usecols)
+    try:
+        Data = read_csv(SatFile, sep=r'\s+', skiprows=1, header=None,
+            usecols=[SatIdx[Var] for Var in Columns], dtype=Types,
+            float_precision='high')
+
+    except EmptyDataError:
+        # File without samples (only the header line)
+        Data = None
+
+    # Build the columns keyed by the SatIdx names
+    if Data is None:
+        SatInfo = OrderedDict({})
+        for Var in Columns:
+            SatInfo[Var] = np.zeros(0, dtype=SatTypes[Var])
+    else:
+        SatInfo = buildSatInfoColumns(Data, Columns)
+
+    # Compute the Epoch boundaries
+    EpochOffsets = computeEpochOffsets(SatInfo["SoD"])
+
+    return SatInfo, EpochOffsets
+
+# FUNCTION: Read the Sat Info file by blocks of whole epochs
+#-----------------------------------------------------------------------
+# Generator yielding (SatInfo, EpochOffsets, EndOffset) blocks as
+# readSatInfoFile does for the whole file. The file is read ChunkRows
+# lines at a time; the last epoch of each chunk, which may be incomplete,
+# is carried over to the next block, so that memory is bounded by the
+# chunk size.
+# EndOffset is the byte offset of the file where the next block starts,
+# so that the reading can be resumed there (Offset). It is None for the
+# last block of the file, whose last epoch may still be incomplete.
+# A last line without end of line is being written: it is not read, and
+# EndOffset never goes past it.
+
+def readSatInfoChunks(SatFile, Columns=None, ChunkRows=1000000, Offset=0):
+    Columns, Types = getSatInfoReadTypes(Columns)
+
+    with open(SatFile, 'rb') as f:
+        # Skip the header line or go to the resume point
+        if Offset == 0:
+            Offset = len(f.readline())
+        else:
+            f.seek(Offset)
+
+        # Lines not yielded yet and the byte offset where each one ends
+        Lines = []
+        LineEnds = np.zeros(0, dtype='int64')
+        while True:
+            Chunk = list(islice(f, ChunkRows))
+
+            # Leave the last line in the file if it is still being written
+            # (no end of line): it is read again with the next chunk
+            if len(Chunk) > 0 and not Chunk[-1].endswith(b"\n"):
+                f.seek(-len(Chunk.pop()), os.SEEK_CUR)
+
+            if len(Chunk) > 0:
+                # Compute the byte offset where each line ends
+                Ends = Offset + np.cumsum([len(Line) for Line in Chunk])
+                Offset = int(Ends[-1])
+
+                # Ignore blank lines as read_csv does
+                Keep = [i for i, Line in enumerate(Chunk) if Line.strip()]
+                Lines += [Chunk[i] for i in Keep]
+                LineEnds = np.concatenate((LineEnds, Ends[Keep]))
+
+            if len(Lines) == 0:
+                break
+
+            # Parse the lines
+            Data = read_csv(BytesIO(b"".join(Lines)), sep=r'\s+',
+                header=None, usecols=[SatIdx[Var] for Var in Columns],
+                dtype=Types, float_precision='high')
+            SatInfo = buildSatInfoColumns(Data, Columns)
+            EpochOffsets = computeEpochOffsets(SatInfo["SoD"])
+
+            # Yield the last block of the file
+            if len(Chunk) == 0:
+                yield SatInfo, EpochOffsets, None
+                break
+
+            # Keep the last epoch for the next block
+            Cut = EpochOffsets[-2]
+            if Cut == 0:
+                continue
+            for Var in Columns:
+                SatInfo[Var] = SatInfo[Var][:Cut]
+            EndOffset = int(LineEnds[Cut - 1])
+            Lines = Lines[Cut:]
+            LineEnds = LineEnds[Cut:]
+
+            # Yield the complete epochs
+            yield SatInfo, EpochOffsets[:-1], EndOffset
+
+# FUNCTION: Parse the whole Sat Info file for the binary cache
+#-----------------------------------------------------------------------
+
+def parseSatInfoColumns(SatFile):
+    # Read all the columns
+    SatInfo, EpochOffsets = readSatInfoFile(SatFile)
+
+    # Keep the Epoch boundaries together with the columns
+    SatInfo["EpochOffsets"] = EpochOffsets
+
+    return SatInfo
+
+# FUNCTION: Read the Sat Info file through the binary cache
+#-----------------------------------------------------------------------
+# CacheConf holds the arguments of readCachedColumns (CacheDir, MaxMb,
+# Verify, Refresh). If it is None the text file is always parsed.
+
+def readSatInfo(SatFile, Columns=None, CacheConf=None):
+    # Parse the text file if there is no cache
+    if CacheConf is None:
+        return readSatInfoFile(SatFile, Columns)
+
+    # Memory-map the columns parsed in a previous run
+    Cached = readCachedColumns(SatFile, parseSatInfoColumns, **CacheConf)
+
+    # By default get all the columns
+    if Columns is None:
+        Columns = list(SatIdx.keys())
+
+    # Select the columns keeping the SoD
+    SatInfo = OrderedDict({})
+    for Var in SatIdx.keys():
+        if Var in Columns or Var == "SoD":
+            SatInfo[Var] = Cached[Var]
+
+    return SatInfo, np.asarray(Cached["EpochOffsets"])
+
+# FUNCTION: Build the Sat Info table used by the plotting functions
+#-----------------------------------------------------------------------
+# The DataFrame columns are labelled by the SatIdx column numbers, as if
+# the file had been read with read_csv, and PRN is decoded into labels
+
+def buildSatData(SatInfo):
+    SatData = DataFrame()
+    for Var, Values in SatInfo.items():
+        if Var == "PRN":
+            Codes, Inverse = np.unique(Values, return_inverse=True)
+            SatData[SatIdx[Var]] = \
+                np.array(decodePrn(Codes), dtype=object)[Inverse.reshape(-1)]
+        else:
+            SatData[SatIdx[Var]] = Values
+
+    return SatData
 
 # FUNCTION: Project a vector into a given direction
 def projectVector(Vector, Direction):
@@ -232,9 +492,64 @@ def computeSreAcr(DeltaT, PosPrev, Pos, Sre):
 
     return SreA, SreC, SreR
 
+# FUNCTION: Dot product of the rows of two Nx3 arrays
+#-----------------------------------------------------------------------
+def dotRows(A, B):
+
+    # Same summation order as the dot product of two 3-element vectors
+    return A[:,0] * B[:,0] + A[:,1] * B[:,1] + A[:,2] * B[:,2]
+
+# FUNCTION: Project each row of an Nx3 array into the given directions
+#-----------------------------------------------------------------------
+def projectVectorArray(Vectors, Directions):
+
+    # Compute the Unitary Vectors
+    UnitaryVectors = Directions / \
+        np.sqrt(dotRows(Directions, Directions))[:, np.newaxis]
+
+    return dotRows(Vectors, UnitaryVectors)
+
+# FUNCTION: Estimate SRE-Along/Cross/Radial of N samples at once
+#-----------------------------------------------------------------------
+# DeltaT is an N-array, PosPrev, Pos and Sre are Nx3 arrays
+def computeSreAcrArray(DeltaT, PosPrev, Pos, Sre):
+
+    # Compute Velocity computation deriving the position
+    Vel = (Pos - PosPrev) / np.asarray(DeltaT)[:, np.newaxis]
+
+    # Add Earth's Rotation Effect on the Reference frame
+    Vel = Vel + np.cross(np.array([0, 0, GnssConstants.OMEGA_EARTH]), Pos)
+
+    # Compute unitary vectors
+    Ur = Pos / np.sqrt(dotRows(Pos, Pos))[:, np.newaxis]
+    Uv = Vel / np.sqrt(dotRows(Vel, Vel))[:, np.newaxis]
+    Uc = np.cross(Ur, Uv)
+    Ua = np.cross(Uc, Ur)
+
+    # Compute SRE in ACR frame by projecting the SRE in XYZ
+    SreA = projectVectorArray(Sre, Ua)
+    SreC = projectVectorArray(Sre, Uc)
+    SreR = projectVectorArray(Sre, Ur)
+
+    return SreA, SreC, SreR
+
+# FUNCTION: Shift values to the previous sample of the same group
+#-----------------------------------------------------------------------
+# Values must be sorted by group and GroupStart holds the first row of
+# each group, which takes the value Init (scalar or one per group)
+def shiftWithinGroups(Values, GroupStart, Init=0):
+
+    # Shift one row down and reset the first row of each group
+    Previous = np.roll(Values, 1, axis=0)
+    Previous[GroupStart] = Init
+
+    return Previous
+
 # FUNCTION: Compute SRE-B
 # ----------------------------------------------------------------------
-def computeSreb(EpochInfo, InterOutputs):
+# Returns the ENT-GPS Offset of the epoch and the SRE-B of each
+# satellite of the epoch (0 if the satellite is not monitored)
+def computeSreb(EpochInfo):
     # List of SRE-B of the monitored satellites
     SrebMonitored = []
 
@@ -262,38 +577,40 @@ def computeSreb(EpochInfo, InterOutputs):
             SrebMonitored.append(float(SatInfo[SatIdx["SREb1"]]) - Srer)            
 
     # Compute ENT-GPS Offset
-    InterOutputs["ENT-GPS"] = np.median(SrebMonitored) 
+    EntGps = np.median(SrebMonitored) 
     
     # Loop over all satellites Information in Epoch
     # --------------------------------------------
+    Sreb = []
     for SatInfo in EpochInfo:
         #Check if satellite is monitored
         if(SatInfo[SatIdx["SRESTAT"]] == '1'):
             #Remove ENT-GPS offset from SREb1
-            InterOutputs[SatInfo[SatIdx["PRN"]]]["SREb"] = \
-             float(SatInfo[SatIdx["SREb1"]]) - InterOutputs["ENT-GPS"]
+            Sreb.append(float(SatInfo[SatIdx["SREb1"]]) - EntGps)
+        else:
+            Sreb.append(0.0)
 
-    return
+    return EntGps, Sreb
 
 
 # FUNCTION: Update Statistics Information
 #-----------------------------------------------------------------------
 
-def updateEpochStats(SatInfo, InterOutputs, Outputs):
-    
-    # Extract PRN Column
-    sat = SatInfo[SatIdx["PRN"]]
+# Sat is the row of the satellite in the accumulators and Sreb its SRE-B
+# (see computeSreb)
+
+def updateEpochStats(SatInfo, Sreb, Accum, Sat):
 
     # Add Number of samples
-    InterOutputs[sat]["NSAMPS"] = InterOutputs[sat]["NSAMPS"] + 1
+    Accum["NSAMPS"][Sat] = Accum["NSAMPS"][Sat] + 1
 
     # Add Satellite Monitoring if Satellite is Monitored
-    Outputs[sat]["MON"] = Outputs[sat]["MON"] + (SatInfo[SatIdx["MONSTAT"]] == '1')
+    Accum["MON"][Sat] = Accum["MON"][Sat] + (SatInfo[SatIdx["MONSTAT"]] == '1')
 
     # Update the Number of Transitions MtoNM and MtoDU
     if((SatInfo[SatIdx["MONSTAT"]] != '1') and \
-        (InterOutputs[sat]["MONPREV"]== '1')):
-        Outputs[sat]["NTRANS"] = Outputs[sat]["NTRANS"] + 1
+        Accum["MONPREV"][Sat]):
+        Accum["NTRANS"][Sat] = Accum["NTRANS"][Sat] + 1
 
     # Ignore the first Epoch in the Statistcs due to Velocity 
     if(int(SatInfo[SatIdx["SoD"]]) > 0.0):  
@@ -303,20 +620,17 @@ def updateEpochStats(SatInfo, InterOutputs, Outputs):
             (SatInfo[SatIdx["SRESTAT"]] == '1')):
 
             #Update the minimum number of rims in view 
-            if(int(SatInfo[SatIdx["NRIMS"]])<Outputs[sat]["RIMS-MIN"]): 
-                Outputs[sat]["RIMS-MIN"] = int(SatInfo[SatIdx["NRIMS"]])
+            if(int(SatInfo[SatIdx["NRIMS"]])<Accum["RIMS-MIN"][Sat]): 
+                Accum["RIMS-MIN"][Sat] = int(SatInfo[SatIdx["NRIMS"]])
 
 
             #ESTIMATE SRE_ACR FROM SRE_XYZ PROJECTED INTO ACR DIRECTION
             #-----------------------------------------------------------------
             #Estimate the Delta Time between previous epoch and current
-            DeltaT = int(SatInfo[SatIdx["SoD"]]) - InterOutputs[sat]["SODPREV"]
+            DeltaT = int(SatInfo[SatIdx["SoD"]]) - Accum["SODPREV"][Sat]
 
             #Extract Previous Satellite Position
-            PosPrev = np.array([
-                InterOutputs[sat]["XPREV"],
-                InterOutputs[sat]["YPREV"],
-                InterOutputs[sat]["ZPREV"]])
+            PosPrev = Accum["POSPREV"][Sat]
                 
             #Extract Correct Satellite Position
             Pos = np.array([
@@ -336,25 +650,23 @@ def updateEpochStats(SatInfo, InterOutputs, Outputs):
             SreA, SreC, SreR = computeSreAcr(DeltaT, PosPrev, Pos, Sre)
 
             #Update sum of SREacr for RMS computation
-            InterOutputs[sat]["SREaSUM2"] = InterOutputs[sat]["SREaSUM2"] + SreA**2
-            InterOutputs[sat]["SREcSUM2"] = InterOutputs[sat]["SREcSUM2"] + SreC**2
-            InterOutputs[sat]["SRErSUM2"] = InterOutputs[sat]["SRErSUM2"] + SreR**2
-
-            #Update number of samples used for RMS of RSE in ACR frame
-            InterOutputs[sat]["SREACRSAMPS"] = InterOutputs[sat]["SREACRSAMPS"] + 1
+            Accum["SREaSUM2"][Sat] = Accum["SREaSUM2"][Sat] + SreA**2
+            Accum["SREcSUM2"][Sat] = Accum["SREcSUM2"][Sat] + SreC**2
+            Accum["SRErSUM2"][Sat] = Accum["SRErSUM2"][Sat] + SreR**2
 
             #Estimate Extreme Values for the other Variables
             #----------------------------------------------------------------------
 
             # Update number of samples Monitored & SRE OK
-            InterOutputs[sat]["SREWSAMPS"] = InterOutputs[sat]["SREWSAMPS"] + 1
+            # (also used for RMS of RSE in ACR frame)
+            Accum["SREWSAMPS"][Sat] = Accum["SREWSAMPS"][Sat] + 1
             #Update the Minimum Number of RIMS in view  
-            if(Outputs[sat]["RIMS-MIN"] > int(SatInfo[SatIdx["NRIMS"]])):
-                Outputs[sat]["RIMS-MIN"] = int(SatInfo[SatIdx["NRIMS"]])
+            if(Accum["RIMS-MIN"][Sat] > int(SatInfo[SatIdx["NRIMS"]])):
+                Accum["RIMS-MIN"][Sat] = int(SatInfo[SatIdx["NRIMS"]])
 
             #Update the Maximum Number of RIMS in view
-            if(Outputs[sat]["RIMS-MAX"] < int(SatInfo[SatIdx["NRIMS"]])):
-                Outputs[sat]["RIMS-MAX"] = int(SatInfo[SatIdx["NRIMS"]])
+            if(Accum["RIMS-MAX"][Sat] < int(SatInfo[SatIdx["NRIMS"]])):
+                Accum["RIMS-MAX"][Sat] = int(SatInfo[SatIdx["NRIMS"]])
 
             #Compute Safety Index (SI) = SREW/(5.33*SigmaFLT)
             if(float(SatInfo[SatIdx["SFLT-W"]])!=0):
@@ -365,52 +677,52 @@ def updateEpochStats(SatInfo, InterOutputs, Outputs):
                 Siw = -1
 
             #Update the Maximum Safety Index
-            if(Outputs[sat]["SIMAX"] < Siw ):
-                Outputs[sat]["SIMAX"] = Siw
+            if(Accum["SIMAX"][Sat] < Siw ):
+                Accum["SIMAX"][Sat] = Siw
             
             #Count the Misleading Informations SIW>1
             if(Siw > 1):
-                Outputs[sat]["NMI"]=Outputs[sat]["NMI"] + 1
+                Accum["NMI"][Sat]=Accum["NMI"][Sat] + 1
 
             #Update the Maximum SigmaFLT
-            if(Outputs[sat]["SFLTMAX"] < float(SatInfo[SatIdx["SFLT-W"]])):
-                Outputs[sat]["SFLTMAX"] = float(SatInfo[SatIdx["SFLT-W"]])
+            if(Accum["SFLTMAX"][Sat] < float(SatInfo[SatIdx["SFLT-W"]])):
+                Accum["SFLTMAX"][Sat] = float(SatInfo[SatIdx["SFLT-W"]])
 
             #Update the Minimum SigmaFLT
-            if(Outputs[sat]["SFLTMIN"] > float(SatInfo[SatIdx["SFLT-W"]])):
-                Outputs[sat]["SFLTMIN"] = float(SatInfo[SatIdx["SFLT-W"]])
+            if(Accum["SFLTMIN"][Sat] > float(SatInfo[SatIdx["SFLT-W"]])):
+                Accum["SFLTMIN"][Sat] = float(SatInfo[SatIdx["SFLT-W"]])
 
             #Update the Maximum FC
-            if(Outputs[sat]["FCMAX"] < abs(float(SatInfo[SatIdx["FC"]]))):
-                Outputs[sat]["FCMAX"] = abs(float(SatInfo[SatIdx["FC"]]))
+            if(Accum["FCMAX"][Sat] < abs(float(SatInfo[SatIdx["FC"]]))):
+                Accum["FCMAX"][Sat] = abs(float(SatInfo[SatIdx["FC"]]))
 
             #Update the Maximum LTCb (Af0)
-            if(Outputs[sat]["LTCbMAX"] < abs(float(SatInfo[SatIdx["AF0"]]))):
-               Outputs[sat]["LTCbMAX"] = abs(float(SatInfo[SatIdx["AF0"]]))
+            if(Accum["LTCbMAX"][Sat] < abs(float(SatInfo[SatIdx["AF0"]]))):
+               Accum["LTCbMAX"][Sat] = abs(float(SatInfo[SatIdx["AF0"]]))
 
             #Update the Maximum LTCx)
-            if(Outputs[sat]["LTCxMAX"] < abs(float(SatInfo[SatIdx["LTCx"]]))):
-                Outputs[sat]["LTCxMAX"] = abs(float(SatInfo[SatIdx["LTCx"]]))
+            if(Accum["LTCxMAX"][Sat] < abs(float(SatInfo[SatIdx["LTCx"]]))):
+                Accum["LTCxMAX"][Sat] = abs(float(SatInfo[SatIdx["LTCx"]]))
 
             #Update the Maximum LTCy)
-            if(Outputs[sat]["LTCyMAX"] < abs(float(SatInfo[SatIdx["LTCy"]]))):
-                Outputs[sat]["LTCyMAX"] = abs(float(SatInfo[SatIdx["LTCy"]]))
+            if(Accum["LTCyMAX"][Sat] < abs(float(SatInfo[SatIdx["LTCy"]]))):
+                Accum["LTCyMAX"][Sat] = abs(float(SatInfo[SatIdx["LTCy"]]))
 
             #Update the Maximum LTCz)
-            if(Outputs[sat]["LTCzMAX"] < abs(float(SatInfo[SatIdx["LTCz"]]))):
-                Outputs[sat]["LTCzMAX"] = abs(float(SatInfo[SatIdx["LTCz"]]))
+            if(Accum["LTCzMAX"][Sat] < abs(float(SatInfo[SatIdx["LTCz"]]))):
+                Accum["LTCzMAX"][Sat] = abs(float(SatInfo[SatIdx["LTCz"]]))
             
             #Update the Maximum SREW
-            if(Outputs[sat]["SREWMAX"] < abs(float(SatInfo[SatIdx["SREW"]]))):
-                Outputs[sat]["SREWMAX"] = abs(float(SatInfo[SatIdx["SREW"]]))
+            if(Accum["SREWMAX"][Sat] < abs(float(SatInfo[SatIdx["SREW"]]))):
+                Accum["SREWMAX"][Sat] = abs(float(SatInfo[SatIdx["SREW"]]))
 
             #Update sum of SREb^2 for RMS computation
-            InterOutputs[sat]["SREbSUM2"] = \
-                InterOutputs[sat]["SREbSUM2"] + float(InterOutputs[sat]["SREb"])**2
+            Accum["SREbSUM2"][Sat] = \
+                Accum["SREbSUM2"][Sat] + Sreb**2
 
             #Update sum of SREW^2 for RMS computation
-            InterOutputs[sat]["SREWSUM2"] = \
-                InterOutputs[sat]["SREWSUM2"] + float(SatInfo[SatIdx["SREW"]])**2
+            Accum["SREWSUM2"][Sat] = \
+                Accum["SREWSUM2"][Sat] + float(SatInfo[SatIdx["SREW"]])**2
 
         #End of if(SatInfo[SatIdx["SRESTAT"]] == '1'):
 
@@ -420,51 +732,487 @@ def updateEpochStats(SatInfo, InterOutputs, Outputs):
     # KEEP CURRENT INFORMATION FOR NEXT EPOCH
 
     #Keep Current SOD
-    InterOutputs[sat]["SODPREV"] = int(SatInfo[SatIdx["SoD"]])
+    Accum["SODPREV"][Sat] = int(SatInfo[SatIdx["SoD"]])
     
     #Keep Current Monitoring Status
-    InterOutputs[sat]["MONPREV"] = SatInfo[SatIdx["MONSTAT"]]
+    Accum["MONPREV"][Sat] = SatInfo[SatIdx["MONSTAT"]] == '1'
 
     #Keep Current Satellite Position 
-    InterOutputs[sat]["XPREV"] = float(SatInfo[SatIdx["SAT-X"]])
-    InterOutputs[sat]["YPREV"] = float(SatInfo[SatIdx["SAT-Y"]])
-    InterOutputs[sat]["ZPREV"] = float(SatInfo[SatIdx["SAT-Z"]])
+    Accum["POSPREV"][Sat] = [
+        float(SatInfo[SatIdx["SAT-X"]]),
+        float(SatInfo[SatIdx["SAT-Y"]]),
+        float(SatInfo[SatIdx["SAT-Z"]])]
 
     #end if(SatInfo[SatIdx["SRESTAT"]] == '1'):
 
 
-# END OF FUNCTION: def updateEpochStats(SatInfo, InterOutputs, Outputs):
+# END OF FUNCTION: def updateEpochStats(SatInfo, Sreb, Accum, Sat):
+
+
+# FUNCTION: Compute ENT-GPS Offset and SRE-B for all the epochs
+#-----------------------------------------------------------------------
+# Batch version of computeSreb: the median of each epoch is computed
+# by sorting the samples within the epoch segments given by EpochOffsets
+def computeSrebBatch(SatInfo, EpochOffsets):
+
+    # Got Satellite positions in meters
+    SatX = SatInfo["SAT-X"] * 1000
+    SatY = SatInfo["SAT-Y"] * 1000
+    SatZ = SatInfo["SAT-Z"] * 1000
+
+    #Got norm of the satellite position vectors
+    GeomNorm = np.sqrt(SatX * SatX + SatY * SatY + SatZ * SatZ)
+
+    #Compute SRE-Radial and SRE-B of each sample
+    Srer = (SatInfo["SREx"] * SatX + \
+        SatInfo["SREy"] * SatY + \
+            SatInfo["SREz"] * SatZ) / GeomNorm
+    SrebAll = SatInfo["SREb1"] - Srer
+
+    # Get the epoch of each sample
+    NEpochs = len(EpochOffsets) - 1
+    EpochSizes = np.diff(EpochOffsets)
+    EpochIndex = np.repeat(np.arange(NEpochs), EpochSizes)
+
+    # Sort the SRE-B of the monitored satellites within each epoch
+    Monitored = SatInfo["SRESTAT"] == 1
+    SrebMonitored = SrebAll[Monitored]
+    EpochMonitored = EpochIndex[Monitored]
+    SrebSorted = SrebMonitored[np.lexsort((SrebMonitored, EpochMonitored))]
+
+    # Get the central samples of each epoch segment
+    NMonitored = np.bincount(EpochMonitored, minlength=NEpochs)
+    Start = np.cumsum(NMonitored) - NMonitored
+    HasSamples = NMonitored > 0
+    Low = (Start + (NMonitored - 1) // 2)[HasSamples]
+    High = (Start + NMonitored // 2)[HasSamples]
+
+    # Compute ENT-GPS Offset as the median of each epoch
+    # (same value as np.median: mean of the two central values
+    # when the number of samples is even, NaN if there are no samples)
+    EntGps = np.full(NEpochs, np.nan)
+    EntGps[HasSamples] = np.where(Low == High,
+        SrebSorted[Low], (SrebSorted[Low] + SrebSorted[High]) / 2.0)
+
+    # Remove ENT-GPS offset from SREb1 of each sample
+    Sreb = SatInfo["SREb1"] - EntGps[EpochIndex]
+
+    return EntGps, Sreb
+
+# FUNCTION: Initialize the Statistics accumulators
+#-----------------------------------------------------------------------
+# One array per accumulated variable, with one row per satellite in the
+# order of the PRN codes of Accum["PRN"]. Satellites are added as they
+# appear in the data (see addSatAccumPrns).
+
+def initializeSatAccum():
+    Accum = OrderedDict({})
+    Accum["PRN"] = np.zeros(0, dtype=SatTypes["PRN"])
+    for Var, (Type, Init, Shape, Merge) in SatAccumVars.items():
+        Accum[Var] = np.zeros((0,) + Shape, dtype=Type)
+
+    return Accum
+
+# FUNCTION: Add new satellites to the Statistics accumulators
+#-----------------------------------------------------------------------
+
+def addSatAccumPrns(Accum, Prns):
+    NewPrns = np.setdiff1d(Prns, Accum["PRN"])
+    if len(NewPrns) == 0:
+        return
 
+    # Keep the satellites sorted by PRN code
+    AllPrns = np.concatenate((Accum["PRN"], NewPrns))
+    Order = np.argsort(AllPrns, kind='stable')
+    Accum["PRN"] = AllPrns[Order]
+    for Var, (Type, Init, Shape, Merge) in SatAccumVars.items():
+        Accum[Var] = np.concatenate((Accum[Var],
+            np.full((len(NewPrns),) + Shape, Init, dtype=Type)))[Order]
 
-# FUNCTION: Compute the final Statistics
+# FUNCTION: Convert the Statistics accumulators to Python lists
 #-----------------------------------------------------------------------
-def computeFinalStatistics(InterOutputs, Outputs):
-    for sat in Outputs.keys():
+# The legacy engine updates the accumulators sample by sample, which is
+# faster with Python lists than with NumPy scalar access
+
+def listSatAccum(Accum):
+    Lists = OrderedDict({})
+    for Var, Values in Accum.items():
+        Lists[Var] = Values.tolist()
 
-        # Estimate the Monitoring Percentage
-        if(InterOutputs[sat]["NSAMPS"] != 0):
+    return Lists
+
+# FUNCTION: Convert the Statistics accumulators back to arrays
+#-----------------------------------------------------------------------
 
+def arraySatAccum(Lists):
+    Accum = OrderedDict({})
+    Accum["PRN"] = np.array(Lists["PRN"], dtype=SatTypes["PRN"])
+    for Var, (Type, Init, Shape, Merge) in SatAccumVars.items():
+        Accum[Var] = np.array(Lists[Var], dtype=Type).reshape(
+            (len(Lists["PRN"]),) + Shape)
+
+    return Accum
+
+# FUNCTION: Update the Statistics accumulators with a block of epochs
+#-----------------------------------------------------------------------
+# The block must be made of whole epochs (see readSatInfoChunks) that
+# follow the ones already accumulated. The sums are accumulated sample
+# by sample in time order, so that the result does not depend on how
+# the file is split into blocks.
+# Returns the ENT-GPS Offset of each epoch of the block
+
+def updateSatAccum(Accum, SatInfo, EpochOffsets):
+
+    # Nothing to accumulate from a block without samples
+    if len(SatInfo["SoD"]) == 0:
+        return np.zeros(0)
+
+    # Compute ENT-GPS Offset and the SRE-B of all the samples
+    EntGps, SrebAll = computeSrebBatch(SatInfo, EpochOffsets)
+
+    # Sort the samples by PRN keeping the time order of each satellite
+    Order = np.argsort(SatInfo["PRN"], kind='stable')
+    Prns, First, SatIndex = np.unique(SatInfo["PRN"][Order],
+        return_index=True, return_inverse=True)
+    SatIndex = SatIndex.reshape(-1)
+    NSats = len(Prns)
+
+    # Get the accumulator row of each satellite and sample
+    addSatAccumPrns(Accum, Prns)
+    Rows = np.searchsorted(Accum["PRN"], Prns)
+    SampleRows = Rows[SatIndex]
+
+    # Extract the sorted columns
+    Sod = SatInfo["SoD"][Order].astype('int64')
+    Mon = SatInfo["MONSTAT"][Order] == 1
+    Sre = SatInfo["SRESTAT"][Order] == 1
+    Pos = np.column_stack((
+        SatInfo["SAT-X"][Order],
+        SatInfo["SAT-Y"][Order],
+        SatInfo["SAT-Z"][Order]))
+
+    # Extract the previous epoch information of each satellite
+    # (kept in the accumulators for the first sample of the block)
+    SodPrev = shiftWithinGroups(Sod, First, Accum["SODPREV"][Rows])
+    MonPrev = shiftWithinGroups(Mon, First, Accum["MONPREV"][Rows])
+    PosPrev = shiftWithinGroups(Pos, First, Accum["POSPREV"][Rows])
+
+    # Add Number of samples and Monitored samples
+    Accum["NSAMPS"][Rows] += np.bincount(SatIndex, minlength=NSats)
+    Accum["MON"][Rows] += np.bincount(SatIndex[Mon], minlength=NSats)
+
+    # Count the Number of Transitions MtoNM and MtoDU
+    Accum["NTRANS"][Rows] += \
+        np.bincount(SatIndex[~Mon & MonPrev], minlength=NSats)
+
+    # Select Monitored samples with SRE OK, ignoring the first Epoch
+    Valid = (Sod > 0) & Mon & Sre
+    Sat = SampleRows[Valid]
+    Accum["SREWSAMPS"][Rows] += \
+        np.bincount(SatIndex[Valid], minlength=NSats)
+
+    # Compute Along-Cross-Radial Components
+    SreXyz = np.column_stack((
+        SatInfo["SREx"][Order][Valid],
+        SatInfo["SREy"][Order][Valid],
+        SatInfo["SREz"][Order][Valid]))
+    SreAcr = computeSreAcrArray(Sod[Valid] - SodPrev[Valid],
+        PosPrev[Valid], Pos[Valid], SreXyz)
+
+    # Extract the other variables of the valid samples
+    Nrims = SatInfo["NRIMS"][Order][Valid]
+    Srew = SatInfo["SREW"][Order][Valid]
+    Sflt = SatInfo["SFLT-W"][Order][Valid]
+    Sreb = SrebAll[Order][Valid]
+
+    #Compute Safety Index (SI) = SREW/(5.33*SigmaFLT)
+    Siw = np.full(len(Srew), -1.0)
+    NonZero = Sflt != 0
+    Siw[NonZero] = Srew[NonZero] / (5.33 * Sflt[NonZero])
+
+    # Update the Extreme values of each satellite
+    for Var, Values, Func in [
+        ("RIMS-MIN", Nrims, np.minimum),
+        ("RIMS-MAX", Nrims, np.maximum),
+        ("SREWMAX", np.abs(Srew), np.maximum),
+        ("SFLTMAX", Sflt, np.maximum),
+        ("SFLTMIN", Sflt, np.minimum),
+        ("SIMAX", Siw, np.maximum),
+        ("FCMAX", np.abs(SatInfo["FC"][Order][Valid]), np.maximum),
+        ("LTCbMAX", np.abs(SatInfo["AF0"][Order][Valid]), np.maximum),
+        ("LTCxMAX", np.abs(SatInfo["LTCx"][Order][Valid]), np.maximum),
+        ("LTCyMAX", np.abs(SatInfo["LTCy"][Order][Valid]), np.maximum),
+        ("LTCzMAX", np.abs(SatInfo["LTCz"][Order][Valid]), np.maximum),
+        ]:
+        Func.at(Accum[Var], Sat, Values)
+
+    # Count the Misleading Informations SIW>1
+    Accum["NMI"][Rows] += \
+        np.bincount(SatIndex[Valid][Siw > 1], minlength=NSats)
+
+    # Update the sums of squares in time order for the RMS computation
+    for Var, Values in [
+        ("SREaSUM2", SreAcr[0]),
+        ("SREcSUM2", SreAcr[1]),
+        ("SRErSUM2", SreAcr[2]),
+        ("SREbSUM2", Sreb),
+        ("SREWSUM2", Srew),
+        ]:
+        np.add.at(Accum[Var], Sat, Values**2)
+
+    # Keep the last epoch information of each satellite for next block
+    Last = np.append(First[1:], len(Sod)) - 1
+    Accum["SODPREV"][Rows] = Sod[Last]
+    Accum["MONPREV"][Rows] = Mon[Last]
+    Accum["POSPREV"][Rows] = Pos[Last]
+
+    return EntGps
+
+# END OF FUNCTION: def updateSatAccum(Accum, SatInfo, EpochOffsets):
+
+# FUNCTION: Compute the final Statistics from the accumulators
+#-----------------------------------------------------------------------
+# Returns the Statistics of all the satellites as one array per
+# SatStatsIdx column, in the order of the PRN codes of the accumulators
+# (GPS satellites first, then Galileo, as in the STAT file)
+
+def buildSatStats(Accum):
+    SatStats = OrderedDict({})
+    NSamps = Accum["NSAMPS"]
+    SreSamps = Accum["SREWSAMPS"]
+    HasSamps = NSamps != 0
+    HasSreSamps = SreSamps != 0
+
+    for Var in SatStatsIdx.keys():
+        if (Var == "PRN"):
+            SatStats[Var] = np.array(decodePrn(Accum["PRN"]), dtype=object)
+
+        elif (Var == "MON"):
             # Monitoring percentage = Monitored epochs / Total epochs
-            Outputs[sat]["MON"] = Outputs[sat]["MON"] * 100.0 / InterOutputs[sat]["NSAMPS"]
-        
-        # Estimate RMS of SREW and SREb
-        if(InterOutputs[sat]["SREWSAMPS"] != 0):
-            Outputs[sat]["SREaRMS"] = sqrt(InterOutputs[sat]["SREaSUM2"] / InterOutputs[sat]["SREWSAMPS"])
-            Outputs[sat]["SREcRMS"] = sqrt(InterOutputs[sat]["SREcSUM2"] / InterOutputs[sat]["SREWSAMPS"])
-            Outputs[sat]["SRErRMS"] = sqrt(InterOutputs[sat]["SRErSUM2"] / InterOutputs[sat]["SREWSAMPS"])
-            Outputs[sat]["SREbRMS"] = sqrt(InterOutputs[sat]["SREbSUM2"] / InterOutputs[sat]["SREWSAMPS"])
-            Outputs[sat]["SREWRMS"] = sqrt(InterOutputs[sat]["SREWSUM2"] / InterOutputs[sat]["SREWSAMPS"])
+            SatStats[Var] = Accum[Var].copy()
+            SatStats[Var][HasSamps] = \
+                Accum[Var][HasSamps] * 100.0 / NSamps[HasSamps]
 
-# END OF FUNCTION: def computeFinalStatistics(InterOutputs, Outputs):
+        elif Var.endswith("RMS"):
+            # Estimate RMS of SRE-ACR, SREW and SREb
+            Sum2 = Accum[Var.replace("RMS", "SUM2")]
+            SatStats[Var] = np.zeros(len(NSamps))
+            SatStats[Var][HasSreSamps] = \
+                np.sqrt(Sum2[HasSreSamps] / SreSamps[HasSreSamps])
 
+        else:
+            SatStats[Var] = Accum[Var].copy()
 
-# FUNCTION: Function to compute the Satellite Statistics
+    return SatStats
+
+# FUNCTION: Merge two Statistics accumulators
+#-----------------------------------------------------------------------
+# AccumB must hold the samples following the ones of AccumA (e.g. the
+# next day). Counts and sums of squares are added and extremes combined,
+# so that the merge is associative: merging the days of a week in any
+# grouping gives the same Statistics (up to the rounding of the sums).
+# Transitions between the last epoch of AccumA and the first epoch of
+# AccumB are not counted, as when each day is processed on its own.
+# Returns a new accumulator.
+
+def mergeSatAccum(AccumA, AccumB):
+    Accum = initializeSatAccum()
+    addSatAccumPrns(Accum, np.union1d(AccumA["PRN"], AccumB["PRN"]))
+    RowsA = np.searchsorted(Accum["PRN"], AccumA["PRN"])
+    RowsB = np.searchsorted(Accum["PRN"], AccumB["PRN"])
+
+    for Var, (Type, Init, Shape, Merge) in SatAccumVars.items():
+        Accum[Var][RowsA] = AccumA[Var]
+        if Merge is None:
+            Accum[Var][RowsB] = AccumB[Var]
+        else:
+            # Satellites only in AccumB are merged with the initial values
+            Accum[Var][RowsB] = Merge(Accum[Var][RowsB], AccumB[Var])
+
+    return Accum
+
+# FUNCTION: Write the Statistics accumulators
+#-----------------------------------------------------------------------
+# The accumulators are stored in a NumPy .npz file together with the
+# Extra arrays. The file is written to a temporary file and then
+# renamed, so that it is never partially written.
+
+def writeSatAccum(AccumFile, Accum, Extra=None):
+    Arrays = OrderedDict({})
+    if Extra is not None:
+        Arrays.update(Extra)
+    for Var, Values in Accum.items():
+        Arrays["ACCUM_" + Var] = Values
+
+    TmpFile = AccumFile + ".tmp%d" % os.getpid()
+    with open(TmpFile, 'wb') as f:
+        np.savez(f, **Arrays)
+    os.replace(TmpFile, AccumFile)
+
+# FUNCTION: Read the Statistics accumulators
 #-----------------------------------------------------------------------
-def computeSatStats(SatFile, EntGpsFile, SatStatsFile):
+# Returns the accumulators and the Extra arrays written by writeSatAccum
+
+def readSatAccum(AccumFile):
+    Accum = initializeSatAccum()
+    Extra = OrderedDict({})
+    with np.load(AccumFile) as Arrays:
+        for Var in Accum.keys():
+            Accum[Var] = Arrays["ACCUM_" + Var]
+        for Name in Arrays.files:
+            if not Name.startswith("ACCUM_"):
+                Extra[Name] = Arrays[Name]
+
+    return Accum, Extra
+
+# FUNCTION: Compute the Statistics of all the satellites at once
+#-----------------------------------------------------------------------
+# Returns the ENT-GPS Offset of each epoch and the accumulators
+def computeSatStatsVector(SatInfo, EpochOffsets):
+
+    # Accumulate the whole day in one block
+    Accum = initializeSatAccum()
+    EntGps = updateSatAccum(Accum, SatInfo, EpochOffsets)
+
+    return EntGps, Accum
+
+# FUNCTION: Write a checkpoint of the Statistics accumulation
+#-----------------------------------------------------------------------
+# The checkpoint holds the accumulators, the ENT-GPS Offsets of the
+# epochs processed, the byte offset of the SAT INFO file reached and the
+# content hash of the file up to that offset. It is written to a
+# temporary file and then renamed (see writeSatAccum).
+
+def writeSatAccumCheckpoint(CheckpointFile, Accum, EpochSod, EntGps,
+    Offset, Hash):
+    Extra = OrderedDict({})
+    Extra["Offset"] = np.array(Offset, dtype='int64')
+    Extra["Hash"] = np.array(Hash)
+    Extra["EpochSod"] = np.concatenate(
+        [np.zeros(0, dtype=SatTypes["SoD"])] + EpochSod)
+    Extra["EntGps"] = np.concatenate([np.zeros(0)] + EntGps)
+
+    writeSatAccum(CheckpointFile, Accum, Extra)
+
+# FUNCTION: Read a checkpoint of the Statistics accumulation
+#-----------------------------------------------------------------------
+# The checkpoint is only used if its offset is at the start of a line and
+# the SAT INFO file still starts with the bytes processed when it was
+# written (the file may have grown since).
+# Returns (Accum, EpochSod, EntGps, Offset, Hash) where Hash is the
+# hashlib object of the bytes up to Offset, or None if the checkpoint
+# does not exist or is not valid.
+
+def readSatAccumCheckpoint(CheckpointFile, SatFile):
+    try:
+        Accum, Extra = readSatAccum(CheckpointFile)
+        Offset = int(Extra["Offset"])
+        HexHash = str(Extra["Hash"])
+        EpochSod = [Extra["EpochSod"]]
+        EntGps = [Extra["EntGps"]]
+
+    except (OSError, KeyError, ValueError):
+        return None
+
+    # Check the content of the file up to the checkpoint
+    # (the reading is only resumed at the start of a line)
+    if Offset <= 0 or os.path.getsize(SatFile) < Offset:
+        return None
+    with open(SatFile, 'rb') as f:
+        f.seek(Offset - 1)
+        if f.read(1) != b"\n":
+            return None
+        f.seek(0)
+        Hash = updateFileHash(hashlib.sha1(), f, Offset)
+    if Hash.hexdigest() != HexHash:
+        return None
+
+    return Accum, EpochSod, EntGps, Offset, Hash
+
+# FUNCTION: Compute the Statistics reading the file by blocks
+#-----------------------------------------------------------------------
+# Streaming version of computeSatStatsVector: memory is bounded by
+# ChunkRows (see readSatInfoChunks) and only the ENT-GPS Offset of each
+# epoch is kept.
+# If CheckpointFile is given, the accumulation is resumed from it when
+# valid and a new checkpoint is written every CheckpointBlocks blocks
+# and before the last block of the file, so that a restarted run (or a
+# run on the grown file) only processes the remaining epochs.
+# Returns the SoD and ENT-GPS Offset of each epoch and the accumulators.
+
+def computeSatStatsStream(SatFile, ChunkRows, CheckpointFile=None,
+    CheckpointBlocks=1):
+
+    # Resume from the checkpoint or start from the beginning
+    Checkpoint = None
+    if CheckpointFile is not None:
+        Checkpoint = readSatAccumCheckpoint(CheckpointFile, SatFile)
+    if Checkpoint is not None:
+        Accum, EpochSod, EntGps, Offset, Hash = Checkpoint
+    else:
+        Accum = initializeSatAccum()
+        EpochSod = []
+        EntGps = []
+        Offset = 0
+        Hash = hashlib.sha1()
+
+    # File used to hash the bytes processed for the checkpoints
+    HashFile = None
+    if CheckpointFile is not None:
+        HashFile = open(SatFile, 'rb')
+        HashFile.seek(Offset)
+
+    try:
+        CheckpointOffset = Offset
+        NBlocks = 0
+        for SatInfo, EpochOffsets, EndOffset in \
+            readSatInfoChunks(SatFile, SatStatsCols, ChunkRows, Offset):
+
+            # Save the state before the last block of the file
+            if HashFile is not None and EndOffset is None and \
+                Offset > CheckpointOffset:
+                writeSatAccumCheckpoint(CheckpointFile, Accum,
+                    EpochSod, EntGps, Offset, Hash.hexdigest())
+
+            EntGps.append(updateSatAccum(Accum, SatInfo, EpochOffsets))
+            EpochSod.append(SatInfo["SoD"][EpochOffsets[:-1]])
+            if EndOffset is None:
+                continue
+
+            # Hash the bytes of the block
+            if HashFile is not None:
+                updateFileHash(Hash, HashFile, EndOffset - Offset)
+            Offset = EndOffset
+
+            # Save the state periodically
+            NBlocks += 1
+            if HashFile is not None and NBlocks % CheckpointBlocks == 0:
+                writeSatAccumCheckpoint(CheckpointFile, Accum,
+                    EpochSod, EntGps, Offset, Hash.hexdigest())
+                CheckpointOffset = Offset
+
+    finally:
+        if HashFile is not None:
+            HashFile.close()
+
+    return np.concatenate([np.zeros(0, dtype=SatTypes["SoD"])] + EpochSod),\
+        np.concatenate([np.zeros(0)] + EntGps), Accum
+
+# FUNCTION: Compute the Statistics epoch by epoch
+#-----------------------------------------------------------------------
+# Returns the SoD and ENT-GPS offset of each epoch and the accumulators
+def computeSatStatsLegacy(SatFile):
     
     # Initialize Variables
     EndOfFile = False
     EpochInfo = []
+    EpochSod = []
+    EntGps = []
+
+    # Initialize the Statistics accumulators (as Python lists) and the
+    # row of each PRN
+    Accum = listSatAccum(initializeSatAccum())
+    SatRows = {}
 
     # Open SAT INFO file
     with open(SatFile, 'r') as fsat:
@@ -472,93 +1220,229 @@ def computeSatStats(SatFile, EntGpsFile, SatStatsFile):
         # Read header line of Sat Information file
         fsat.readline()
 
-        # Open ENT-GPS Offset output file
-        with open(EntGpsFile, 'w') as fEntGps:
+        # LOOP over all Epochs of SAT INFO file
+        # ----------------------------------------------------------
+        while not EndOfFile:
+            
+            # Read Only One Epoch
+            EpochInfo = readSatInfoEpoch(fsat)
+            
+            # If EpochInfor is not Null
+            if EpochInfo != []:
+                # Compute SRE b
+                EpochEntGps, EpochSreb = computeSreb(EpochInfo)
+
+                # Keep ENT-GPS Offset
+                EpochSod.append(int(EpochInfo[0][SatIdx["SoD"]]))
+                EntGps.append(EpochEntGps)
+
+                # Add the satellites seen for the first time
+                Prns = [SatInfo[SatIdx["PRN"]] for SatInfo in EpochInfo]
+                if any(Prn not in SatRows for Prn in Prns):
+                    Accum = arraySatAccum(Accum)
+                    addSatAccumPrns(Accum, encodePrn(Prns))
+                    Accum = listSatAccum(Accum)
+                    SatRows = dict((Prn, Row) for Row, Prn in \
+                        enumerate(decodePrn(Accum["PRN"])))
+
+                # Loop over all Satellites Information in Epoch
+                # --------------------------------------------------
+                for SatInfo, Sreb in zip(EpochInfo, EpochSreb):
+                    
+                    # Update the Output Statistics
+                    updateEpochStats(SatInfo, Sreb, Accum,
+                        SatRows[SatInfo[SatIdx["PRN"]]])
+                    
+                #End of for SatInfo, Sreb in zip(EpochInfo, EpochSreb):
+                                    
+            # end if EpochInfo != []:
+            else:
+                EndOfFile = True
+
+            #End of if EpochInfo != []:
+            
+        # End of while not EndOfFile:
 
-            # Write Header of Output files
-            fEntGps.write("#SoD  ENT-GPS\n")
+    # End of with open(SatFile, 'r') as f:
 
-            # Open Output File Satellite Statistics file
-            with open(SatStatsFile, 'w') as fOut:
-                
-                # Write Header of Output files
-                fOut.write("#PRN  MON   minRIMS MaxRIMS SREaRMS  SREcRMS  SRErRMS  SREbRMS  SREWRMS  SREWMAX SFLTMAX   SFLTMIN   SIMAX    FCMAX   LTCbMAX  LTCxMAX  LTCyMAX  LTCzMAX   NMI  NTRANS \n")
+    return np.array(EpochSod, dtype='int64'), \
+        np.array(EntGps, dtype='float64'), arraySatAccum(Accum)
 
-                # Define and Initialize Variables            
-                Outputs = OrderedDict({})
-                InterOutputs = OrderedDict({})
-                
-                # Initialize Outputs
-                initializeOutputs(Outputs)
-                initializeInterOutputs(InterOutputs)
+# END OF FUNCTION: def computeSatStatsLegacy(SatFile):
 
-                # LOOP over all Epochs of SAT INFO file
-                # ----------------------------------------------------------
-                while not EndOfFile:
-                    
-                    # Read Only One Epoch
-                    EpochInfo = readSatInfoEpoch(fsat)
-                    
-                    # If EpochInfor is not Null
-                    if EpochInfo != []:
-                        # Compute SRE b
-                        computeSreb(EpochInfo, InterOutputs)
-
-                        # Write ENT-GPS Offset file
-                        fEntGps.write("%5s %10.4f\n" % \
-                            (
-                                EpochInfo[0][SatIdx["SoD"]],
-                                InterOutputs["ENT-GPS"]
-                            ))
-
-                        # Loop over all Satellites Information in Epoch
-                        # --------------------------------------------------
-                        for SatInfo in EpochInfo:
-                            
-                            # Update the Output Statistics
-                            updateEpochStats(SatInfo, InterOutputs, Outputs)
-                            
-                        #End of for SatInfo in EpochInfo:
-                                            
-                    # end if EpochInfo != []:
-                    else:
-                        EndOfFile = True
-
-                    #End of if EpochInfo != []:
-                    
-                # End of while not EndOfFile:
 
-                # Compute the final Statistics
-                # ----------------------------------------------------------
-                computeFinalStatistics(InterOutputs, Outputs)
-                
-                # Write Statistics File
-                # ----------------------------------------------------------
-                
-                # Define Output file format
-                Format = "%s %6.2f %4d %6d %10.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %4d"
-                FormatList = Format.split()
+# Number of rows formatted and written at once by writeTextRows
+TEXT_WRITE_ROWS = 4096
 
-                for sat in Outputs.keys():
-                    
-                    # Remove 0% monitored satellites because we're not interested in them
-                    if(Outputs[sat]["MON"] != 0):
-                       # print(Outputs[sat].keys())
+# FUNCTION: Write the rows of columns of values with a row format
+#-----------------------------------------------------------------------
+# The rows are formatted with RowFormat % Row and written by blocks of
+# TEXT_WRITE_ROWS rows
+def writeTextRows(f, RowFormat, Columns):
+    NRows = len(Columns[0]) if len(Columns) > 0 else 0
+    for Start in range(0, NRows, TEXT_WRITE_ROWS):
+        Block = [Values[Start:Start + TEXT_WRITE_ROWS].tolist() \
+            for Values in Columns]
+        f.write("".join([RowFormat % Row for Row in zip(*Block)]))
+
+# FUNCTION: Write the ENT-GPS Offset file
+#-----------------------------------------------------------------------
+def writeEntGps(EntGpsFile, EpochSod, EntGps):
 
-                        for i, result in enumerate(Outputs[sat]):
-                            fOut.write(((FormatList[i] + " ") % Outputs[sat][result]))
+    # Open ENT-GPS Offset output file
+    with open(EntGpsFile, 'w') as fEntGps:
 
-                        fOut.write("\n")
+        # Write Header of Output files
+        fEntGps.write("#SoD  ENT-GPS\n")
 
-                        # End of for i, result in enumerate(Outputs[sat]):
-                    # End of if(Outputs[sat]["MON"] != 0):
-                # End of for sat in Outputs.keys():
-            # End of with open(SatStatsFile, 'w') as fOut:
-        # End of with open(EntGpsFile, 'w') as fEntGps:
-    # End of with open(SatFile, 'r') as f:
+        # Format and write all the epochs by blocks
+        writeTextRows(fEntGps, "%5d %10.4f\n", [EpochSod, EntGps])
+
+# END OF FUNCTION: def writeEntGps(EntGpsFile, EpochSod, EntGps):
+
+
+# FUNCTION: Write the Satellite Statistics file
+#-----------------------------------------------------------------------
+# SatStats holds the Statistics of the satellites (see buildSatStats)
+def writeSatStats(SatStatsFile, SatStats):
+
+    # Define Output file format
+    Format = "%s %6.2f %4d %6d %10.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f %4d"
+
+    # Remove 0% monitored satellites because we're not interested in them
+    Monitored = SatStats["MON"] != 0
 
-#End of def computeSatStats(SatFile, EntGpsFile, SatStatsFile):
+    # Open Output File Satellite Statistics file
+    with open(SatStatsFile, 'w') as fOut:
+        
+        # Write Header of Output files
+        fOut.write("#PRN  MON   minRIMS MaxRIMS SREaRMS  SREcRMS  SRErRMS  SREbRMS  SREWRMS  SREWMAX SFLTMAX   SFLTMIN   SIMAX    FCMAX   LTCbMAX  LTCxMAX  LTCyMAX  LTCzMAX   NMI  NTRANS \n")
+
+        # Format and write all the satellites by blocks
+        # (each value is followed by a blank)
+        writeTextRows(fOut, Format + " \n",
+            [Values[Monitored] for Values in SatStats.values()])
+
+# END OF FUNCTION: def writeSatStats(SatStatsFile, SatStats):
+
+
+# FUNCTION: Build the Satellite Statistics table
+#-----------------------------------------------------------------------
+# Same rows as the STAT file, columns labelled by SatStatsIdx
+def buildSatStatsData(SatStats):
+    # Remove 0% monitored satellites as in the STAT file
+    Monitored = SatStats["MON"] != 0
+
+    SatStatsData = DataFrame()
+    for Var, Values in SatStats.items():
+        SatStatsData[SatStatsIdx[Var]] = Values[Monitored]
+
+    return SatStatsData
+
+# FUNCTION: Build the ENT-GPS Offset table
+#-----------------------------------------------------------------------
+# Same rows as the ENTGPS file, columns labelled by EntGpsIdx
+def buildEntGpsData(EpochSod, EntGps):
+    EntGpsData = DataFrame()
+    EntGpsData[EntGpsIdx["SoD"]] = EpochSod
+    EntGpsData[EntGpsIdx["ENT-GPS"]] = EntGps
+
+    return EntGpsData
+
+
+# FUNCTION: Append the table of one day to a binary columnar file
+#-----------------------------------------------------------------------
+# Data is a Satellite Statistics or ENT-GPS Offset table (see
+# buildSatStatsData and buildEntGpsData) and Idx its columns (SatStatsIdx
+# or EntGpsIdx). The columns are written as typed binary columns (see
+# COMMON.Columnar) together with the Julian Day of each row ("JD"), so
+# that several days are kept in one file. PRNs are written as PRN codes
+# (see encodePrn). The rows of the day, if already in the file (e.g. the
+# day is processed again), are replaced.
+# The file is read with COMMON.Columnar.loadColumnar.
+
+def appendSatColumnar(ColumnarDir, Jd, Data, Idx):
+    # Build the columns of the day
+    Columns = OrderedDict({})
+    Columns["JD"] = np.full(len(Data), Jd, dtype='int32')
+    for Var, Index in Idx.items():
+        Values = Data[Index].to_numpy()
+        if Var == "PRN":
+            Values = encodePrn(Values) if len(Values) > 0 \
+                else np.zeros(0, dtype=SatTypes["PRN"])
+        Columns[Var] = Values
+
+    # Remove the rows of the day already in the file
+    if readColumnarSchema(ColumnarDir) is not None and \
+        (loadColumnar(ColumnarDir, ["JD"])["JD"] == Jd).any():
+        Kept = loadColumnar(ColumnarDir, Mmap=False)
+        Keep = Kept["JD"] != Jd
+        writeColumnar(ColumnarDir, OrderedDict(
+            (Var, Values[Keep]) for Var, Values in Kept.items()))
+
+    appendColumnar(ColumnarDir, Columns)
+
+# FUNCTION: Function to compute the Satellite Statistics
+#-----------------------------------------------------------------------
+# Engine "VECTOR" computes the statistics of the whole day with grouped
+# NumPy reductions, Engine "LEGACY" processes the file epoch by epoch.
+# Both engines produce the same STAT and ENTGPS files.
+# CacheConf (see readSatInfo) is only used by the "VECTOR" engine.
+# Without the cache most of the "VECTOR" time is the parsing of the text
+# file (about 80%), so it is only about 13-20x faster than "LEGACY".
+# The speedup over 20x needs the cache (SAT_CACHE = 1), with which the
+# runs after the first one don't parse the file.
+# If ChunkRows is given, the "VECTOR" engine reads the file by blocks of
+# about ChunkRows rows (bounded memory, no cache) with the same results,
+# saving checkpoints to CheckpointFile if given (see
+# computeSatStatsStream).
+# The accumulators are written to AccumFile if given, so that several
+# days can be merged (see mergeSatAccum).
+# The STAT and ENTGPS files are only written if their names are given.
+# Returns the Satellite Statistics and ENT-GPS Offset tables.
+def computeSatStats(SatFile, EntGpsFile=None, SatStatsFile=None,
+    Engine="VECTOR", CacheConf=None, ChunkRows=None,
+    CheckpointFile=None, CheckpointBlocks=1, AccumFile=None):
+
+    if Engine == "VECTOR":
+        if ChunkRows:
+            # Compute the Statistics reading the file by blocks
+            EpochSod, EntGps, Accum = computeSatStatsStream(SatFile,
+                ChunkRows, CheckpointFile, CheckpointBlocks)
+
+        else:
+            # Read the whole SAT INFO file
+            SatInfo, EpochOffsets = \
+                readSatInfo(SatFile, SatStatsCols, CacheConf)
+
+            # Compute the Statistics of the whole day
+            EntGps, Accum = computeSatStatsVector(SatInfo, EpochOffsets)
+            EpochSod = SatInfo["SoD"][EpochOffsets[:-1]]
+
+    else:
+        # Compute the Statistics epoch by epoch
+        EpochSod, EntGps, Accum = computeSatStatsLegacy(SatFile)
+
+    # Write the accumulators to be merged with other days
+    if AccumFile is not None:
+        writeSatAccum(AccumFile, Accum)
+
+    # Compute the final Statistics
+    SatStats = buildSatStats(Accum)
+
+    # Write ENT-GPS Offset file
+    if EntGpsFile is not None:
+        writeEntGps(EntGpsFile, EpochSod, EntGps)
+
+    # Write Statistics File
+    if SatStatsFile is not None:
+        writeSatStats(SatStatsFile, SatStats)
+
+    return buildSatStatsData(SatStats), buildEntGpsData(EpochSod, EntGps)
+
+#End of def computeSatStats(SatFile, EntGpsFile, SatStatsFile, Engine,
+#    CacheConf, ChunkRows, CheckpointFile, CheckpointBlocks, AccumFile):
     
 ########################################################################
 #END OF SAT FUNCTIONS MODULE
-########################################################################
\ No newline at end of file
+########################################################################
@@ -27,13 +27,18 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 import sys, os
+import io, traceback
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
 from collections import OrderedDict
 from pandas import read_csv 
 from SatFunctions import RIMSIdx
 from SatFunctions import SatStatsIdx
-from SatFunctions import SatIdx
 from SatFunctions import EntGpsIdx
+from SatFunctions import appendSatColumnar
 from SatFunctions import computeSatStats
+from SatFunctions import readSatInfo
+from SatFunctions import buildSatData
 from COMMON.Dates import convertYearMonthDay2JulianDay
 from COMMON.Dates import convertJulianDay2YearMonthDay
 from COMMON.Dates import convertYearMonthDay2Doy
@@ -88,47 +93,30 @@ def processConf(Conf):
 
     return Conf
 
-#######################################################
-# MAIN BODY
-#######################################################
-
-# Check Input Arguments
-if len(sys.argv) != 2:
-    displayUsage()
-    sys.exit()
-
-# Extract the arguments
-Scen = sys.argv[1]
-
-# Select the conf file name
-CfgFile = Scen + '/CFG/satperformances.cfg'
-
-# Read conf file
-Conf = readConf(CfgFile)
-#print(dump(Conf))
+# Function to get the configuration of the SAT INFO binary cache
+# Returns None if the cache is disabled
+def getCacheConf(Conf):
+    if Conf.get("SAT_CACHE", "0") != '1':
+        return None
 
-# Process Configuration Parameters
-Conf = processConf(Conf)
+    CacheConf = OrderedDict({})
 
-# Print 
-print('------------------------------------')
-print('--> RUNNING SAT-PERFORMANCE ANALYSIS:')
-print('------------------------------------')
+    # Cache directory (default: .cache next to the SAT INFO files)
+    CacheConf["CacheDir"] = Conf.get("SAT_CACHE_DIR", "")
 
+    # Maximum size of the cache in MB (0: no limit)
+    CacheConf["MaxMb"] = float(Conf.get("SAT_CACHE_MAX_MB", "0"))
 
-#>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-#>>>>> RIMS & SatStats FILE ANALYSES
-#>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+    # Check the content hash even if size and mtime didn't change
+    CacheConf["Verify"] = Conf.get("SAT_CACHE_VERIFY", "0") == '1'
 
-# Get RIMS file full path
-RimsFile = Scen + '/INP/RIMS/' + Conf["RIMS_FILE"]
-SatStatsFile = Scen + '/OUT/SAT/' + Conf["SatStats_FILE"]
+    # Parse again the files and replace the cache entries
+    CacheConf["Refresh"] = Conf.get("SAT_CACHE_REFRESH", "0") == '1'
 
+    return CacheConf
 
-# Loop over Julian Days in simulation
-#-----------------------------------------------------------------------
-for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
-
+# Function to build the names of the files of one day
+def getDayFiles(Scen, Conf, Jd):
     # Compute Year, Month and Day in order to build input file name
     Year, Month, Day = convertJulianDay2YearMonthDay(Jd)
     
@@ -148,6 +136,28 @@ for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
     # Define the name of the Output file Statistics
     SatStatsFile = SatFile.replace("INFO", "STAT")
 
+    return Doy, SatFile, EntGpsFile, SatStatsFile
+
+# Function to build the names of the binary columnar files holding the
+# Satellite Statistics and ENT-GPS Offsets of all the days
+def getColumnarFiles(Scen, Conf):
+    SatStatsDir = Scen + \
+        '/OUT/SAT/' + 'SAT_STAT_G123_%ss.col' % Conf["TSTEP"]
+    EntGpsDir = Scen + \
+        '/OUT/SAT/' + 'ENTGPS_G123_%ss.col' % Conf["TSTEP"]
+
+    return SatStatsDir, EntGpsDir
+
+# Function to build the name of the Statistics accumulators file of a
+# SAT INFO file (see SatAggregate.py)
+def getAccumFile(SatFile):
+    return os.path.splitext(SatFile.replace("INFO", "ACCUM"))[0] + '.npz'
+
+# Function to compute the Satellite Statistics of one day
+# Returns the Satellite Statistics and ENT-GPS Offset tables
+def processDay(Scen, Conf, Jd):
+    # Get the files of the day
+    Doy, SatFile, EntGpsFile, SatStatsFile = getDayFiles(Scen, Conf, Jd)
 
     # Display Message
     print('\n*** Processing Day of Year: ', Doy, '...***')
@@ -155,242 +165,242 @@ for Jd in range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1):
     # Display Message
     print('1. Processing file:', SatFile)
     
-    # Compute Satellite Statistics  FILE
-    computeSatStats(SatFile, EntGpsFile, SatStatsFile)
+    # Write the STAT and ENTGPS files only if requested
+    if Conf.get("WRITE_SAT_FILES", "1") != '1':
+        EntGpsFile = None
+        SatStatsFile = None
+
+    # Save checkpoints of the Statistics accumulation if requested
+    # (only when reading the file by blocks)
+    CheckpointFile = None
+    if Conf.get("SAT_STATS_CHECKPOINT", "0") == '1':
+        CheckpointFile = \
+            os.path.splitext(SatFile.replace("INFO", "CKPT"))[0] + '.npz'
+
+    # Save the Statistics accumulators of the day to be merged into
+    # weekly or monthly Statistics if requested
+    AccumFile = None
+    if Conf.get("SAVE_SAT_ACCUM", "0") == '1':
+        AccumFile = getAccumFile(SatFile)
+
+    # Compute Satellite Statistics
+    # (reading SAT_STATS_CHUNK_ROWS rows at a time, 0: whole file)
+    SatStatsData, EntGpsData = computeSatStats(SatFile,
+        EntGpsFile, SatStatsFile,
+        Conf.get("SAT_STATS_ENGINE", "VECTOR"), getCacheConf(Conf),
+        int(Conf.get("SAT_STATS_CHUNK_ROWS", "0")),
+        CheckpointFile, int(Conf.get("SAT_STATS_CHECKPOINT_BLOCKS", "1")),
+        AccumFile)
 
     # Display Creation message
-    print('2. Created files:', SatStatsFile, EntGpsFile)
-    
-    # Display Reading Message
-    print('3. Reading file:', SatStatsFile, RimsFile)
-    
-    
-    # Read Statistics file
-       
-
-    # Display Generating figures Message
-    print('4. Generating Figures...\n')
-    
-    # Generate Satellite Performances figures
+    if SatStatsFile is not None:
+        print('2. Created files:', SatStatsFile, EntGpsFile)
+
+    return SatStatsData, EntGpsData
+
+# Function to run processDay keeping its console log
+# Returns the Julian Day, the log, the error traceback (None if OK) and
+# the tables returned by processDay (None if the day failed)
+def runDay(Scen, Conf, Jd):
+    Log = io.StringIO()
+    Error = None
+    Tables = None
+    with redirect_stdout(Log), redirect_stderr(Log):
+        try:
+            Tables = processDay(Scen, Conf, Jd)
+
+        except Exception:
+            Error = traceback.format_exc()
+
+    return Jd, Log.getvalue(), Error, Tables
+
+# Function to generate the figures of the Satellite Statistics of one day
+# SatStatsData is the Satellite Statistics table returned by computeSatStats
+# PlotPool is the pool of plot rendering processes (or None)
+# Returns the failed plots (see SatPlots.generateSatPlots)
+def generateStatsFigures(Conf, RimsFile, SatStatsData, PlotPool=None):
+    Loaders = OrderedDict({})
 
-# Display RIMS MAP
-    if(Conf["Plot_RIMS_MAP"] == '1'):
     # Read the cols we need from RIMS file
-        RimsData = read_csv(RimsFile, delim_whitespace=True, skiprows=15, header=None,\
-        usecols=[RIMSIdx["p4"],RIMSIdx["p5"],RIMSIdx["p2"]])
-        
-        print( 'Display the network of RIMS...')
-
-        # Configure plot and call plot generation function
-        SatPlots.Plot_RIMSMAP(RimsData)
-
-    #Plot Satellite Monitoring Percentage
-    if(Conf["Plot_MON"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["MON"]])
-        
-        print( 'Plot Satellite Monitoring Percentage...')
+    Loaders["RIMS"] = lambda Columns: \
+        read_csv(RimsFile, delim_whitespace=True, skiprows=15, header=None,\
+        usecols=[RIMSIdx[Column] for Column in Columns])
 
-        # Configure plot and call plot generation function
-        SatPlots.Plot_MON(SatStatsData)
-
-#Plot Minimum and Max. Number of RIMS in View
-    if(Conf["Plot_NRIMS"] == '1'):
-    # Read the cols we need from Sat file
-       SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-       usecols=[SatStatsIdx["PRN"],SatStatsIdx["RIMS-MIN"],SatStatsIdx["RIMS-MAX"]])
-    
-       print( 'Plot Minimum and Max. Number of RIMS in View...')
-
-        # Configure plot and call plot generation function
-       SatPlots.Plot_NRIMS(SatStatsData)
-
-#Plot RMS SREA for all satellites as a box-plot   
-    if(Conf["Plot_RMS-SREACR"] == '1'):  
-    # Read the cols we need from Rims file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1 , header=None,\
-        usecols=[SatStatsIdx["PRN"], SatStatsIdx["SREaRMS"], SatStatsIdx["SREcRMS"], SatStatsIdx["SRErRMS"]])
-    
-        print( 'Plot RMS of SREW along/cross/radial along the day  ...')
-        
-        # Configure plot and call plot generation function
-        SatPlots.plotSREacrRMS(SatStatsData)
-    
+    # Satellite Statistics are already in memory
+    Loaders["SATSTATS"] = lambda Columns: SatStatsData
 
-#Plot RMS SREB for all satellites as a box-plot
-    if(Conf["Plot_RMS-SREB"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["SREbRMS"]])
-        
-        print( 'Plot RMS SREB for all satellites as a box-plot...')
+    # Configure plots and call plot generation functions
+    return SatPlots.generateSatPlots(Conf, Loaders, PlotPool)
 
-        # Configure plot and call plot generation function
-        SatPlots.plotSREbRMS(SatStatsData)
+# Function to generate the figures Vs. Time of one day
+# EntGpsData is the ENT-GPS Offset table returned by computeSatStats
+# PlotPool is the pool of plot rendering processes (or None)
+# Returns the failed plots (see SatPlots.generateSatPlots)
+def generateTimeFigures(Conf, SatFile, EntGpsData, PlotPool=None):
+    # Get the configuration of the SAT INFO binary cache
+    CacheConf = getCacheConf(Conf)
 
-#Plot RMS and MAX SREW for all satellites as a box-plot
-    if(Conf["Plot_SREW"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["SREWRMS"],SatStatsIdx["SREWMAX"]])
-    
-        print( 'Plot RMS and MAX SREW for all satellites as a box-plot...')
+    Loaders = OrderedDict({})
 
-        # Configure plot and call plot generation function
-        SatPlots.plotRmsSrewMaxSrew(SatStatsData)
+    # Read the cols we need from SAT file
+    Loaders["SAT"] = lambda Columns: \
+        buildSatData(readSatInfo(SatFile, Columns, CacheConf)[0])
 
-#Plot MAX and MIN SigmaFLT for all satellites as a box-plot
-    if(Conf["Plot_SFLTW"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["SFLTMIN"],SatStatsIdx["SFLTMAX"]])
-    
-        print( 'Plot MAX and MIN SigmaFLT for all satellites as a box-plot...')
+    # ENT-GPS Offsets are already in memory
+    Loaders["ENTGPS"] = lambda Columns: EntGpsData
 
-        # Configure plot and call plot generation function
-        SatPlots.plotMinMaxSFLT(SatStatsData)
+    # Configure plots and call plot generation functions
+    return SatPlots.generateSatPlots(Conf, Loaders, PlotPool)
 
+#######################################################
+# MAIN BODY
+#######################################################
 
-#Plot MAX SIW for all satellites as a box-plot
-    if(Conf["Plot_MAXSIW"] == '1'):
-    # Read the cols we need from SatStats file
-       SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-       usecols=[SatStatsIdx["PRN"],SatStatsIdx["SIMAX"]])
-    
-       print( 'Plot MAX SIW for all satellites as a box-plot...')
+if __name__ == "__main__":
 
-        # Configure plot and call plot generation function
-       SatPlots.plotMaxSiw(SatStatsData)
+    # Check Input Arguments
+    if len(sys.argv) != 2:
+        displayUsage()
+        sys.exit()
 
+    # Extract the arguments
+    Scen = sys.argv[1]
 
-#Plot MAX SIW for all satellites as a box-plot
-    if(Conf["Plot_MAXFCLTCb"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["LTCbMAX"],SatStatsIdx["FCMAX"]])
-    
-        print( 'Plot MAX Satellite Clock Fast and Long term Corrections for all satellites...')
+    # Select the conf file name
+    CfgFile = Scen + '/CFG/satperformances.cfg'
 
-        # Configure plot and call plot generation function
-        SatPlots.plotMaxFcLTCb(SatStatsData)
+    # Read conf file
+    Conf = readConf(CfgFile)
+    #print(dump(Conf))
 
-#Plot MAX LTC-XYZ for all satellites
-    if(Conf["Plot_MAXLTC-XYZ"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["LTCxMAX"],SatStatsIdx["LTCyMAX"],SatStatsIdx["LTCzMAX"]])
-    
-        print( 'Plot MAX LTC-XYZ for all satellites...')
+    # Process Configuration Parameters
+    Conf = processConf(Conf)
 
-        # Configure plot and call plot generation function
-        SatPlots.plotMaxLTCxyz(SatStatsData)
+    # Print 
+    print('------------------------------------')
+    print('--> RUNNING SAT-PERFORMANCE ANALYSIS:')
+    print('------------------------------------')
 
-#Plot Number of MIs for all satellites as a box-plot
-    if(Conf["Plot_NMI"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["NMI"]])
-    
-        print( 'Plot Number of MIs for all satellites as a box-plot...')
 
-        # Configure plot and call plot generation function
-        SatPlots.plotNmi(SatStatsData)
+    #>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
+    #>>>>> RIMS & SatStats FILE ANALYSES
+    #>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
 
-#Plot Number of Transitions for all satellites as a box-plot
-    if(Conf["Plot_NTRANS"] == '1'):
-    # Read the cols we need from SatStats file
-        SatStatsData = read_csv(SatStatsFile, delim_whitespace=True, skiprows=1, header=None,\
-        usecols=[SatStatsIdx["PRN"],SatStatsIdx["NTRANS"]])
-    
-        print( 'Plot Number of Transitions for all satellites as a box-plot...')
+    # Get RIMS file full path
+    RimsFile = Scen + '/INP/RIMS/' + Conf["RIMS_FILE"]
 
-        # Configure plot and call plot generation function
-        SatPlots.plotNtrans(SatStatsData)
+    # Get the number of parallel workers (1: process days sequentially)
+    NumWorkers = int(Conf.get("NUM_WORKERS", "1"))
 
-#PLOTS Vs. TIME /////////////////////////////////////////////////////////////////////////////////
-# Plot Satellite monitored
-if(Conf["PLOT_MON1"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"], SatIdx["MONSTAT"]])
-    
-    print( 'Plot the instantaneous number of satellites monitored...')
+    # Stats-only run if requested or if no figure is enabled: the
+    # plotting stack (matplotlib, basemap) is never imported
+    StatsOnly = Conf.get("STATS_ONLY", "0") == '1' or \
+        not SatPlots.isSatPlotEnabled(Conf)
 
-    # Configure plot and call plot generation function
-    SatPlots.plotMON1(SatData)
-#Plot satellites monitoring windows
-if(Conf["PLOT_MON2"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"],SatIdx["PRN"],SatIdx["NRIMS"],SatIdx["MONSTAT"]])
-    
-    print( 'Plot satellites monitoring windows...')
+    # Create the plot rendering processes once for the whole run
+    PlotPool = None if StatsOnly else SatPlots.createSatPlotPool(Conf)
 
-    # Configure plot and call plot generation function
-    SatPlots.plotMon2(SatData)
+    # Julian Days in simulation
+    Jds = range(Conf["INI_DATE_JD"], Conf["END_DATE_JD"] + 1)
 
-# Plot Satellite Tracks figures
-if(Conf["PLOT_MON3"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"],SatIdx["SAT-X"], SatIdx["SAT-Y"], SatIdx["SAT-Z"], SatIdx["NRIMS"],SatIdx["MONSTAT"]])
-    
-    print( 'Plot the satellites ground tracks on a map during monitoring periods...')
+    # Launch the processing of the days in a pool of processes
+    if NumWorkers > 1:
+        Pool = ProcessPoolExecutor(max_workers=NumWorkers)
+        Results = [Pool.submit(runDay, Scen, Conf, Jd) for Jd in Jds]
 
-    # Configure plot and call plot generation function
-    SatPlots.plotMon3(SatData)
+    # Or process them one after another
+    else:
+        Pool = None
+        Results = (runDay(Scen, Conf, Jd) for Jd in Jds)
 
-# Plot SREW figures
-if(Conf["PLOT_SREWvsTime"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"],SatIdx["NRIMS"], SatIdx["SREW"]])
-    
-    print( 'Plot the SREW for all satellites as a function of the hour of the day...')
+    # Loop over Julian Days in simulation, in order
+    #-----------------------------------------------------------------------
+    FailedDays = OrderedDict({})
+    FailedPlots = OrderedDict({})
+    for Jd, Result in zip(Jds, Results):
+        # Wait for the day processed in the pool
+        if Pool is not None:
+            try:
+                Result = Result.result()
 
-    # Configure plot and call plot generation function
-    SatPlots.plotSREW(SatData)
+            except Exception:
+                Result = (Jd, "", traceback.format_exc(), None)
 
-# Plot SigmaFLT (PRN) figures
-if(Conf["PLOT_SigmaFLT_PRN"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"],SatIdx["PRN"], SatIdx["SFLT-W"],SatIdx["RDOP"]])
-    
-    print( 'Plot the SigmaFLT for all satellites...')
+        Jd, Log, Error, Tables = Result
 
-    # Configure plot and call plot generation function
-    SatPlots.plotSigmaFLTPRN(SatData)
-# Plot Si figures
-if(Conf["PLOT_SI"] == '1'):
-    # Read the cols we need from SAT file
-    SatData = read_csv(SatFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[SatIdx["SoD"],SatIdx["NRIMS"], SatIdx["SFLT-W"],SatIdx["SREW"]])
-    
-    print( 'Plot the SI for all satellites...')
+        # Display the log of the day
+        sys.stdout.write(Log)
 
-    # Configure plot and call plot generation function
-    SatPlots.plotSI(SatData)
+        # Get the files of the day
+        Doy, SatFile, EntGpsFile, SatStatsFile = \
+            getDayFiles(Scen, Conf, Jd)
 
-# Plot ENT-GPS Offset figures
-if(Conf["PLOT_ENT-GPSOffset"] == '1'):
-    # Read the cols we need from SAT file
-    EntGpsData = read_csv(EntGpsFile, delim_whitespace=True, skiprows=1, header=None,\
-    usecols=[EntGpsIdx["SoD"],EntGpsIdx["ENT-GPS"]])
-    
-    print( 'Plot the ENT-GPS Offset along the day...')
+        if Error is not None:
+            sys.stderr.write(Error)
+            FailedDays[SatFile] = Error.strip().splitlines()[-1]
+            continue
 
-    # Configure plot and call plot generation function
-    SatPlots.plotENTGps(EntGpsData)
+        # Keep the tables of the day in memory
+        SatStatsData, EntGpsData = Tables
 
+        # Append the tables of the day to the binary columnar files
+        # (done here, in the order of the days, also with parallel workers)
+        if Conf.get("WRITE_SAT_COLUMNAR", "0") == '1':
+            SatStatsDir, EntGpsDir = getColumnarFiles(Scen, Conf)
+            appendSatColumnar(SatStatsDir, Jd, SatStatsData, SatStatsIdx)
+            appendSatColumnar(EntGpsDir, Jd, EntGpsData, EntGpsIdx)
+            print('2. Appended to files:', SatStatsDir, EntGpsDir)
 
+        if StatsOnly:
+            continue
 
-print('------------------------------------')
-print('--> END OF SAT-PERFORMANCE ANALYSIS:')
-print('------------------------------------')
+        # Display Reading Message
+        print('3. Reading file:', RimsFile)
 
-print('Check figures at the Output folder SAT/figures/')
+        # Display Generating figures Message
+        print('4. Generating Figures...\n')
+        
+        # Generate Satellite Performances figures
+        for Flag, Error in \
+            generateStatsFigures(Conf, RimsFile, SatStatsData,
+                PlotPool).items():
+            FailedPlots[Flag + " " + SatFile] = Error
+
+    # End of for Result in Results:
+
+    if Pool is not None:
+        Pool.shutdown()
+
+    # Generate the figures Vs. Time of the last day
+    if not StatsOnly and SatFile not in FailedDays:
+        for Flag, Error in \
+            generateTimeFigures(Conf, SatFile, EntGpsData,
+                PlotPool).items():
+            FailedPlots[Flag + " " + SatFile] = Error
+
+    if PlotPool is not None:
+        PlotPool.shutdown()
+
+    print('------------------------------------')
+    print('--> END OF SAT-PERFORMANCE ANALYSIS:')
+    print('------------------------------------')
+
+    print('Check figures at the Output folder SAT/figures/')
+
+    # Display the summary of the failed days
+    if len(FailedDays) > 0:
+        sys.stderr.write("ERROR: %d day(s) failed:\n" % len(FailedDays))
+        for SatFile, Error in FailedDays.items():
+            sys.stderr.write("  %s: %s\n" % (SatFile, Error))
+
+    # Display the summary of the failed plots
+    if len(FailedPlots) > 0:
+        sys.stderr.write("ERROR: %d plot(s) failed:\n" % len(FailedPlots))
+        for Plot, Error in FailedPlots.items():
+            sys.stderr.write("  %s: %s\n" % (Plot, Error))
+
+    if len(FailedDays) > 0 or len(FailedPlots) > 0:
+        sys.exit(1)
 
 
 #######################################################
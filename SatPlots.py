@@ -19,6 +19,8 @@
 # Import External and Internal functions and Libraries
 #----------------------------------------------------------------------
 import sys, os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 # Add path to find all modules
 Common = os.path.dirname(os.path.dirname(
     os.path.abspath(sys.argv[0]))) + '/COMMON'
@@ -38,16 +40,18 @@ from SatFunctions import SatStatsIdx
 sys.path.append(os.getcwd() + '/' + \
     os.path.dirname(sys.argv[0]) + '/' + 'COMMON')
 from COMMON import GnssConstants
-from COMMON.Plots import generatePlot
 
 
 # from pyproj import Transformer
-from COMMON.Coordinates import xyz2llh
+from COMMON.Coordinates import xyz2llhArray
 from array import *
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+# Call generatePlot from Plots library
+# The plotting stack (matplotlib, basemap) is only imported when the
+# first figure is generated
+def generatePlot(PlotConf):
+    from COMMON.Plots import generatePlot as generatePlotLib
+    generatePlotLib(PlotConf)
 
 # Define SAT INFO FILE Columns
 SatIdx = OrderedDict({})
@@ -631,6 +635,61 @@ def plotNtrans(SatStatsData):
     
     # Call generatePlot from Plots library
     generatePlot(PlotConf)
+
+# Define the values of the SAT INFO status columns (MONSTAT, SRESTAT)
+SatStatusValues = OrderedDict({})
+SatStatusValues["MONITORED"] = 1
+SatStatusValues["NOT-MONITORED"] = 0
+SatStatusValues["DONT USE"] = -1
+
+# Count the satellites of each status at each epoch
+# Returns the sorted epochs (SoD) and the number of satellites of each
+# status (SatStatusValues) at each epoch, in a single pass over the rows
+def countEpochStatus(SatData, StatusCol):
+    Epochs, EpochIndex = np.unique(SatData[SatIdx["SoD"]].to_numpy(),
+        return_inverse=True)
+    Status = SatData[StatusCol].to_numpy()
+
+    Counts = OrderedDict({})
+    for Label, Value in SatStatusValues.items():
+        Counts[Label] = np.bincount(EpochIndex[Status == Value],
+            minlength=len(Epochs))
+
+    return Epochs, Counts
+
+# Build the index of the rows of each PRN, once per day for all the plots
+# iterating over the satellites
+# The rows are stably sorted by PRN (so that each PRN keeps the epochs
+# order): the rows of Prns[i] are Order[Offsets[i]:Offsets[i + 1]]
+def buildPrnGroups(PrnValues):
+    Prns, Inverse = np.unique(np.asarray(PrnValues), return_inverse=True)
+
+    PrnGroups = OrderedDict({})
+    PrnGroups["Prns"] = Prns.tolist()
+    PrnGroups["Order"] = np.argsort(Inverse, kind='stable')
+    PrnGroups["Offsets"] = np.concatenate(([0],
+        np.cumsum(np.bincount(Inverse, minlength=len(Prns)))))
+
+    return PrnGroups
+
+# Keep the rows of Mask in the PRN groups (all the PRNs are kept, with
+# no rows if none is selected)
+def selectPrnGroups(PrnGroups, Mask):
+    Keep = np.asarray(Mask)[PrnGroups["Order"]]
+    Kept = np.concatenate(([0], np.cumsum(Keep)))
+
+    Selected = OrderedDict({})
+    Selected["Prns"] = PrnGroups["Prns"]
+    Selected["Order"] = PrnGroups["Order"][Keep]
+    Selected["Offsets"] = Kept[PrnGroups["Offsets"]]
+
+    return Selected
+
+# Get the values of a column sorted by PRN groups
+# The values of the PRN i are the view Values[Offsets[i]:Offsets[i + 1]]
+def groupPrnValues(PrnGroups, Values):
+    return np.asarray(Values)[PrnGroups["Order"]]
+
 ##PLOT VS TIMES
 # Plot Number_of_Satellites_Monitored_EGNOS_SIS_D014Y19  
 def plotMON1(SatData):
@@ -657,42 +716,11 @@ def plotMON1(SatData):
     PlotConf["Color"] = {}
     PlotConf["Legend"] = {}
 
-    NMON = []
-    NNM = []
-    NDU = []
-
-    for SoD in unique (SatData[SatIdx["SoD"]]):
-        M = 1
-        NM = 0
-        DU = -1
-        FilterCond = (SatData[SatIdx["SoD"]]) == SoD
-        MonstatSoD = SatData[SatIdx["MONSTAT"]][FilterCond]
-        
-
-        FilterCond = MonstatSoD == 1
-        M = np.sum(FilterCond)
-        NMON.append(M)
-
-        FilterCond = MonstatSoD == 0
-        NM = np.sum(FilterCond)
-        NNM.append(NM)
-       
-        FilterCond = MonstatSoD == -1
-        DU = np.sum(FilterCond)
-        NDU.append(DU)
-    
-    Label = ["MONITORED", "NOT-MONITORED", "DONT USE"]
-    Color = ["red","green", "blue"]
-
-    
-    PlotConf["xData"]["MONITORED"] = unique (SatData[SatIdx["SoD"]]) / GnssConstants.S_IN_H
-    PlotConf["yData"]["MONITORED"] = NMON
-
-    PlotConf["xData"]["NOT-MONITORED"] = unique (SatData[SatIdx["SoD"]]) / GnssConstants.S_IN_H
-    PlotConf["yData"]["NOT-MONITORED"] = NNM
+    Epochs, Counts = countEpochStatus(SatData, SatIdx["MONSTAT"])
 
-    PlotConf["xData"]["DONT USE"] = unique (SatData[SatIdx["SoD"]]) / GnssConstants.S_IN_H
-    PlotConf["yData"]["DONT USE"] = NDU
+    for Label, Count in Counts.items():
+        PlotConf["xData"][Label] = Epochs / GnssConstants.S_IN_H
+        PlotConf["yData"][Label] = Count
 
     PlotConf["Path"] = sys.argv[1] + '/OUT/SAT/Figures/' + 'Number_of_Satellites_Monitored_EGNOS_SIS_D014Y19.png'
 
@@ -700,7 +728,7 @@ def plotMON1(SatData):
     generatePlot(PlotConf)
 
 #Plot satellites monitoring windows
-def plotMon2(SatData):
+def plotMon2(SatData, PrnGroups=None):
     PlotConf = {}
 
     PlotConf["Type"] = "Lines"
@@ -723,20 +751,32 @@ def plotMon2(SatData):
     PlotConf["ColorBarMin"] = 0.
     PlotConf["ColorBarMax"] = 40.
 
+    # Density mode: colour the cells by the highest number of RIMS
+    PlotConf["DensityReduce"] = "MAX"
+
     
     PlotConf["xData"] = {}
     PlotConf["yData"] = {}
     PlotConf["zData"] = {}
 
+    if PrnGroups is None:
+        PrnGroups = buildPrnGroups(SatData[SatIdx["PRN"]])
+
+    # Monitored rows of each PRN
     FilterCond = (SatData[SatIdx["MONSTAT"]]) == 1
-    
-    
-    for prn in sorted(unique(SatData[SatIdx["PRN"]])):
+    Groups = selectPrnGroups(PrnGroups, FilterCond)
+    Hours = groupPrnValues(Groups, SatData[SatIdx["SoD"]]) / \
+        GnssConstants.S_IN_H
+    Prns = groupPrnValues(Groups, SatData[SatIdx["PRN"]])
+    NRims = groupPrnValues(Groups, SatData[SatIdx["NRIMS"]])
+
+    Offsets = Groups["Offsets"]
+    for i, prn in enumerate(Groups["Prns"]):
         Label = prn 
-        FilterCond2 = SatData[SatIdx["PRN"]] == prn
-        PlotConf["xData"][Label] = SatData[SatIdx["SoD"]][FilterCond][FilterCond2]/ GnssConstants.S_IN_H
-        PlotConf["yData"][Label] = SatData[SatIdx["PRN"]][FilterCond][FilterCond2]
-        PlotConf["zData"][Label] = SatData[SatIdx["NRIMS"]][FilterCond][FilterCond2]
+        Rows = slice(Offsets[i], Offsets[i + 1])
+        PlotConf["xData"][Label] = Hours[Rows]
+        PlotConf["yData"][Label] = Prns[Rows]
+        PlotConf["zData"][Label] = NRims[Rows]
 
     PlotConf["Path"] = sys.argv[1] + '/OUT/SAT/Figures/' + 'Satellite_Monitoring_EGNOS_SIS_DO14Y19.png'
 
@@ -782,20 +822,16 @@ def plotMon3(SatData):
     PlotConf["ColorBarMax"] = 40.
 
     # Transform ECEF to Geodetic  
-    SatData[SatIdx["SAT-X"]].to_numpy()
-    SatData[SatIdx["SAT-Y"]].to_numpy()
-    SatData[SatIdx["SAT-Z"]].to_numpy()
-    DataLen = len(SatData[SatIdx["SAT-X"]])
+    x = SatData[SatIdx["SAT-X"]].to_numpy() * 1000
+    y = SatData[SatIdx["SAT-Y"]].to_numpy() * 1000
+    z = SatData[SatIdx["SAT-Z"]].to_numpy() * 1000
+    DataLen = len(x)
     Longitude = np.zeros(DataLen)
     Latitude = np.zeros(DataLen)
-    # transformer = Transformer.from_crs('epsg:4978', 'epsg:4326')
-    for index in range(DataLen):
-        x = SatData[SatIdx["SAT-X"]][index] * 1000
-        y = SatData[SatIdx["SAT-Y"]][index] * 1000
-        z = SatData[SatIdx["SAT-Z"]][index] * 1000
-        if x + y + z != 0:
-           Longitude[index], Latitude[index],h = xyz2llh(x, y, z)
-           # Latitude[index], Longitude[index], h = transformer.transform(x, y, z)
+    # Rows without satellite position are kept at (0, 0)
+    Valid = x + y + z != 0
+    Longitude[Valid], Latitude[Valid], h = \
+        xyz2llhArray(np.column_stack((x[Valid], y[Valid], z[Valid])))
     
     PlotConf["Legend"] = {"Legend1" : "RIMS"}
     PlotConf["Legend"].keys()
@@ -842,6 +878,9 @@ def plotSREW(SatData):
     PlotConf["ColorBarMax"] = 32.
     PlotConf["ColorBarTicks"] = sorted(unique(SatData[SatIdx["NRIMS"]])) 
 
+    # Density mode: colour the cells by the highest number of RIMS
+    PlotConf["DensityReduce"] = "MAX"
+
     PlotConf["xData"] = {}
     PlotConf["yData"] = {}
     PlotConf["zData"] = {}
@@ -857,7 +896,7 @@ def plotSREW(SatData):
     generatePlot(PlotConf)
 
 #Plot the SigmaFLT for all satellites as a function of the hour of the day
-def plotSigmaFLTPRN(SatData):
+def plotSigmaFLTPRN(SatData, PrnGroups=None):
     PlotConf = {}
 
     PlotConf["Type"] = "Lines"
@@ -880,6 +919,9 @@ def plotSigmaFLTPRN(SatData):
     PlotConf["ColorBarLabel"] = "Inverse Radial DOP"
     PlotConf["ColorBarMin"] = 0.
     PlotConf["ColorBarMax"] = 100.
+
+    # Density mode: colour the cells by the mean Inverse Radial DOP
+    PlotConf["DensityReduce"] = "MEAN"
     
 
 
@@ -887,13 +929,22 @@ def plotSigmaFLTPRN(SatData):
     PlotConf["yData"] = {}
     PlotConf["zData"] = {}
 
+    if PrnGroups is None:
+        PrnGroups = buildPrnGroups(SatData[SatIdx["PRN"]])
+
+    Hours = groupPrnValues(PrnGroups, SatData[SatIdx["SoD"]]) / \
+        GnssConstants.S_IN_H
+    SigmaFlt = groupPrnValues(PrnGroups, SatData[SatIdx["SFLT-W"]])
+    Rdop = groupPrnValues(PrnGroups, SatData[SatIdx["RDOP"]])
+
     Label = []
-    for prn in sorted(unique(SatData[SatIdx["PRN"]])):
+    Offsets = PrnGroups["Offsets"]
+    for i, prn in enumerate(PrnGroups["Prns"]):
         Label = prn
-        FilterCond = SatData[SatIdx["PRN"]]== prn 
-        PlotConf["xData"][Label] = ((SatData[SatIdx["SoD"]])[FilterCond]) / GnssConstants.S_IN_H
-        PlotConf["yData"][Label] = ((SatData[SatIdx["SFLT-W"]])[FilterCond])
-        PlotConf["zData"][Label] = ((SatData[SatIdx["RDOP"]])[FilterCond])
+        Rows = slice(Offsets[i], Offsets[i + 1])
+        PlotConf["xData"][Label] = Hours[Rows]
+        PlotConf["yData"][Label] = SigmaFlt[Rows]
+        PlotConf["zData"][Label] = Rdop[Rows]
 
         PlotConf["Path"] = sys.argv[1] + '/OUT/SAT/Figures/' + 'SAT_SFLT_EGNOS_D014Y19.png'
 
@@ -925,6 +976,9 @@ def plotSI(SatData):
     PlotConf["ColorBarMax"] = 39.
     PlotConf["ColorBarTicks"] = sorted(unique(SatData[SatIdx["NRIMS"]]))
 
+    # Density mode: colour the cells by the highest number of RIMS
+    PlotConf["DensityReduce"] = "MAX"
+
     PlotConf["xData"] = {}
     PlotConf["yData"] = {}
     PlotConf["zData"] = {}
@@ -981,6 +1035,201 @@ def plotENTGps(EntGpsData):
     # Call generatePlot from Plots library
     generatePlot(PlotConf)
 
+# Define the registry of plots
+# Each entry is the configuration flag enabling the plot, the source of
+# the data (SatPlotSources), the columns of the source used by the plot
+# function, the message displayed and the plot function itself.
+# The functions iterating over the satellites (PrnGroups set) also get
+# the PRN groups of the source (see buildPrnGroups), built once.
+# The entries are in the order in which the plots are generated.
+#----------------------------------------------------------------------
+SatPlotSources = OrderedDict({})
+SatPlotSources["RIMS"] = RIMSIdx
+SatPlotSources["SATSTATS"] = SatStatsIdx
+SatPlotSources["SAT"] = SatIdx
+SatPlotSources["ENTGPS"] = EntGpsIdx
+
+SatPlotRegistry = OrderedDict({})
+
+def registerPlot(Flag, Source, Columns, Message, Function,
+    PrnGroups=False):
+    SatPlotRegistry[Flag] = OrderedDict({})
+    SatPlotRegistry[Flag]["Source"] = Source
+    SatPlotRegistry[Flag]["Columns"] = Columns
+    SatPlotRegistry[Flag]["Message"] = Message
+    SatPlotRegistry[Flag]["Function"] = Function
+    SatPlotRegistry[Flag]["PrnGroups"] = PrnGroups
+
+# Satellite Statistics figures
+registerPlot("Plot_RIMS_MAP", "RIMS", ["p2", "p4", "p5"],
+    'Display the network of RIMS...', Plot_RIMSMAP)
+registerPlot("Plot_MON", "SATSTATS", ["PRN", "MON"],
+    'Plot Satellite Monitoring Percentage...', Plot_MON)
+registerPlot("Plot_NRIMS", "SATSTATS", ["PRN", "RIMS-MIN", "RIMS-MAX"],
+    'Plot Minimum and Max. Number of RIMS in View...', Plot_NRIMS)
+registerPlot("Plot_RMS-SREACR", "SATSTATS",
+    ["PRN", "SREaRMS", "SREcRMS", "SRErRMS"],
+    'Plot RMS of SREW along/cross/radial along the day  ...', plotSREacrRMS)
+registerPlot("Plot_RMS-SREB", "SATSTATS", ["PRN", "SREbRMS"],
+    'Plot RMS SREB for all satellites as a box-plot...', plotSREbRMS)
+registerPlot("Plot_SREW", "SATSTATS", ["PRN", "SREWRMS", "SREWMAX"],
+    'Plot RMS and MAX SREW for all satellites as a box-plot...',
+    plotRmsSrewMaxSrew)
+registerPlot("Plot_SFLTW", "SATSTATS", ["PRN", "SFLTMIN", "SFLTMAX"],
+    'Plot MAX and MIN SigmaFLT for all satellites as a box-plot...',
+    plotMinMaxSFLT)
+registerPlot("Plot_MAXSIW", "SATSTATS", ["PRN", "SIMAX"],
+    'Plot MAX SIW for all satellites as a box-plot...', plotMaxSiw)
+registerPlot("Plot_MAXFCLTCb", "SATSTATS", ["PRN", "FCMAX", "LTCbMAX"],
+    'Plot MAX Satellite Clock Fast and Long term Corrections for all satellites...',
+    plotMaxFcLTCb)
+registerPlot("Plot_MAXLTC-XYZ", "SATSTATS",
+    ["PRN", "LTCxMAX", "LTCyMAX", "LTCzMAX"],
+    'Plot MAX LTC-XYZ for all satellites...', plotMaxLTCxyz)
+registerPlot("Plot_NMI", "SATSTATS", ["PRN", "NMI"],
+    'Plot Number of MIs for all satellites as a box-plot...', plotNmi)
+registerPlot("Plot_NTRANS", "SATSTATS", ["PRN", "NTRANS"],
+    'Plot Number of Transitions for all satellites as a box-plot...',
+    plotNtrans)
+
+# Figures Vs. Time
+registerPlot("PLOT_MON1", "SAT", ["SoD", "MONSTAT"],
+    'Plot the instantaneous number of satellites monitored...', plotMON1)
+registerPlot("PLOT_MON2", "SAT", ["SoD", "PRN", "MONSTAT", "NRIMS"],
+    'Plot satellites monitoring windows...', plotMon2, PrnGroups=True)
+registerPlot("PLOT_MON3", "SAT",
+    ["SoD", "SAT-X", "SAT-Y", "SAT-Z", "MONSTAT", "NRIMS"],
+    'Plot the satellites ground tracks on a map during monitoring periods...',
+    plotMon3)
+registerPlot("PLOT_SREWvsTime", "SAT", ["SoD", "SREW", "NRIMS"],
+    'Plot the SREW for all satellites as a function of the hour of the day...',
+    plotSREW)
+registerPlot("PLOT_SigmaFLT_PRN", "SAT", ["SoD", "PRN", "SFLT-W", "RDOP"],
+    'Plot the SigmaFLT for all satellites...', plotSigmaFLTPRN,
+    PrnGroups=True)
+registerPlot("PLOT_SI", "SAT", ["SoD", "SREW", "SFLT-W", "NRIMS"],
+    'Plot the SI for all satellites...', plotSI)
+registerPlot("PLOT_ENT-GPSOffset", "ENTGPS", ["SoD", "ENT-GPS"],
+    'Plot the ENT-GPS Offset along the day...', plotENTGps)
+
+# Get the union of the columns of each source used by the enabled plots
+# Only the sources in Sources are considered
+def getSatPlotLoadPlan(Conf, Sources):
+    LoadPlan = OrderedDict({})
+    for Flag, Plot in SatPlotRegistry.items():
+        if Plot["Source"] not in Sources or Conf[Flag] != '1':
+            continue
+        Columns = LoadPlan.setdefault(Plot["Source"], [])
+        for Column in Plot["Columns"]:
+            if Column not in Columns:
+                Columns.append(Column)
+
+    # Keep the columns in file order
+    for Source, Columns in LoadPlan.items():
+        Columns.sort(key=SatPlotSources[Source].get)
+
+    return LoadPlan
+
+# Set the non-interactive backend in the plot rendering processes
+def initSatPlotWorker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+# Run the plot function of a registry entry
+# Returns None or the error traceback, so that the errors of the
+# rendering processes get back to the driver with the plot flag
+def runSatPlot(Flag, PlotData, PrnGroups=None):
+    try:
+        if SatPlotRegistry[Flag]["PrnGroups"]:
+            SatPlotRegistry[Flag]["Function"](PlotData, PrnGroups)
+        else:
+            SatPlotRegistry[Flag]["Function"](PlotData)
+
+    except Exception:
+        return traceback.format_exc()
+
+    return None
+
+# Check whether any plot of the registry is enabled
+def isSatPlotEnabled(Conf):
+    for Flag in SatPlotRegistry:
+        if Conf.get(Flag, '0') == '1':
+            return True
+
+    return False
+
+# Create the pool of plot rendering processes of the run
+# With PLOT_WORKERS > 1 the plots are rendered concurrently in a pool of
+# processes using the Agg backend, created once and shared by all the
+# calls to generateSatPlots (to be shut down at the end of the run).
+# Returns None if the plots are rendered in this process.
+def createSatPlotPool(Conf):
+    NumWorkers = int(Conf.get("PLOT_WORKERS", "1"))
+    if NumWorkers <= 1:
+        return None
+
+    return ProcessPoolExecutor(max_workers=NumWorkers,
+        initializer=initSatPlotWorker)
+
+# Generate the enabled plots of the given sources
+# Loaders maps each source to a function returning its data table
+# given the list of columns to load. Each source is loaded once with
+# the union of the columns of its enabled plots.
+# The plots are rendered in Pool (see createSatPlotPool) if given, or
+# one after another in this process.
+# Returns the failed plots (flag: last line of the error)
+def generateSatPlots(Conf, Loaders, Pool=None):
+    LoadPlan = getSatPlotLoadPlan(Conf, Loaders.keys())
+
+    # Load each source once
+    Data = OrderedDict({})
+    for Source, Columns in LoadPlan.items():
+        Data[Source] = Loaders[Source](Columns)
+
+    # Build the PRN groups of the sources of the enabled plots needing them
+    Groups = OrderedDict({})
+    for Flag, Plot in SatPlotRegistry.items():
+        if Plot["Source"] in Data and Conf[Flag] == '1' and \
+            Plot["PrnGroups"] and Plot["Source"] not in Groups:
+            Idx = SatPlotSources[Plot["Source"]]
+            Groups[Plot["Source"]] = \
+                buildPrnGroups(Data[Plot["Source"]][Idx["PRN"]])
+
+    # Dispatch the plots
+    Results = OrderedDict({})
+    for Flag, Plot in SatPlotRegistry.items():
+        if Plot["Source"] in Data and Conf[Flag] == '1':
+            print(Plot["Message"])
+
+            # Configure plot and call plot generation function
+            if Pool is not None:
+                # Only send the columns used by the plot
+                Idx = SatPlotSources[Plot["Source"]]
+                PlotData = Data[Plot["Source"]][
+                    [Idx[Column] for Column in Plot["Columns"]]]
+                Results[Flag] = Pool.submit(runSatPlot, Flag, PlotData,
+                    Groups.get(Plot["Source"]))
+
+            else:
+                Results[Flag] = runSatPlot(Flag, Data[Plot["Source"]],
+                    Groups.get(Plot["Source"]))
+
+    # Collect the errors
+    Errors = OrderedDict({})
+    for Flag, Result in Results.items():
+        if Pool is not None:
+            try:
+                Result = Result.result()
+
+            except Exception:
+                Result = traceback.format_exc()
+
+        if Result is not None:
+            sys.stderr.write("ERROR: Plot %s failed:\n%s" % (Flag, Result))
+            Errors[Flag] = Result.strip().splitlines()[-1]
+
+    return Errors
+
 ########################################################################
 #END OF SAT FUNCTIONS MODULE
 ########################################################################